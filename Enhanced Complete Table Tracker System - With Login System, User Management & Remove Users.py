@@ -3,18 +3,214 @@
 Enhanced Complete Table Tracker System - With Login System, User Management & Remove Users
 """
 
+import atexit
+import bisect
+import csv
+import gzip
+import hashlib
+import hmac
+import io
+import itertools
 import json
+import logging
+import logging.handlers
+import os
+import queue
+import re
+import sqlite3
+import sys
 import threading
 import time
-from flask import Flask, render_template_string, request, jsonify, redirect, url_for, flash, session
+import zlib
+from flask import Flask, Response, render_template, request, jsonify, redirect, url_for, flash, session
 from flask_cors import CORS
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
+from werkzeug.routing import BaseConverter
 from werkzeug.security import generate_password_hash, check_password_hash
-from functools import wraps
-from datetime import datetime
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from contextlib import contextmanager
+from functools import lru_cache, wraps
 import socket
 import webbrowser
 
+logger = logging.getLogger('table_tracker')
+
+def setup_logging(level='INFO'):
+    """Route log records through a queue to a background writer thread.
+    
+    Request threads only enqueue records, so a slow terminal or journald never
+    blocks them. Records are formatted as 'time level logger key=value ...'.
+    """
+    log_queue = queue.Queue(-1)
+    console = logging.StreamHandler()
+    console.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s %(message)s'))
+    listener = logging.handlers.QueueListener(log_queue, console, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    
+    root = logging.getLogger()
+    root.handlers[:] = [logging.handlers.QueueHandler(log_queue)]
+    root.setLevel(level)
+    # The dev server logs every request at INFO; keep that for debugging only
+    logging.getLogger('werkzeug').setLevel(logging.DEBUG if level == 'DEBUG' else logging.WARNING)
+    return listener
+
+# Compact separators, as jsonify uses outside debug mode
+JSON_SEPARATORS = (',', ':')
+DATE_PATTERN = re.compile(r'\d{4}-\d{2}-\d{2}')
+
+
+def parse_local_time(value, end_of_day=False):
+    """Epoch seconds for local YYYY-MM-DD[THH:MM[:SS]] or plain epoch seconds, else None.
+    
+    With end_of_day, a bare date means the start of the following day.
+    """
+    if value.replace('.', '', 1).isdigit():
+        return float(value)
+    for fmt in ('%Y-%m-%dT%H:%M:%S', '%Y-%m-%dT%H:%M', '%Y-%m-%d'):
+        try:
+            local = time.strptime(value, fmt)
+        except ValueError:
+            continue
+        days = 1 if end_of_day and fmt == '%Y-%m-%d' else 0
+        return time.mktime((local.tm_year, local.tm_mon, local.tm_mday + days,
+                            local.tm_hour, local.tm_min, local.tm_sec, 0, 0, -1))
+    return None
+
+
+def dumps_with(payload, key, encoded):
+    """json.dumps(payload) with one extra member whose value is already JSON text"""
+    return f'{json.dumps(payload, separators=JSON_SEPARATORS)[:-1]},"{key}":{encoded}}}'
+
+
+def gzip_chunks(chunks, level=6):
+    """gzip-compress a stream of byte chunks on the fly"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+class RateLimitedHeartbeat:
+    """Runs emit() at most once per interval, whichever thread asks first"""
+    
+    def __init__(self, interval, emit):
+        self.interval = interval
+        self.emit = emit
+        self.next_at = 0.0
+        self.lock = threading.Lock()
+    
+    def maybe_emit(self):
+        now = time.monotonic()
+        if now < self.next_at:
+            return
+        with self.lock:
+            if now < self.next_at:
+                return
+            self.next_at = now + self.interval
+        self.emit()
+
+class LoginGuard:
+    """Checks login passwords on a small worker pool and throttles repeated attempts.
+    
+    Password hashes are deliberately slow to check, so a burst of logins would
+    otherwise hold the server threads that answer table polls. At most
+    `workers` checks run at once and `max_pending` more may wait; any further
+    login is turned away immediately. Every attempt takes a token from its
+    client address's bucket. Only failed attempts take one from the username's
+    bucket, so several tablets signing in to a shared account are never
+    throttled. A wrong password that has already failed against the same hash
+    is rejected from memory without hashing it again.
+    """
+    
+    def __init__(self, workers=2, max_pending=6, timeout=10, user_burst=5, user_per_minute=5,
+                 client_burst=20, client_per_minute=20, failed_ttl=900, max_entries=10000):
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="login")
+        self.slots = threading.BoundedSemaphore(workers + max_pending)
+        self.timeout = timeout
+        # kind -> (bucket size, tokens added per second)
+        self.limits = {'user': (user_burst, user_per_minute / 60), 'client': (client_burst, client_per_minute / 60)}
+        self.buckets = {}  # (kind, key) -> [tokens, updated_at]
+        # Keyed digests of (username, hash, password) that failed -> expiry time
+        self.failed_digests = OrderedDict()
+        self.failed_ttl = failed_ttl
+        self.max_entries = max_entries
+        self.secret = os.urandom(32)
+        self.lock = threading.Lock()
+    
+    def tokens(self, key, now):
+        """Tokens in a bucket after refilling it up to now. Callers hold lock."""
+        burst, rate = self.limits[key[0]]
+        bucket = self.buckets.get(key)
+        return burst if bucket is None else min(burst, bucket[0] + (now - bucket[1]) * rate)
+    
+    def take(self, username, client):
+        """Admit one attempt, spending a client token: 0 if allowed, else seconds until the next one is.
+        
+        The username's bucket is only checked here; failed() spends from it.
+        """
+        now = time.monotonic()
+        with self.lock:
+            if len(self.buckets) > self.max_entries:
+                # Full buckets hold no information, so they can be dropped
+                self.buckets = {key: bucket for key, bucket in self.buckets.items()
+                                if self.tokens(key, now) < self.limits[key[0]][0]}
+            wait = 0.0
+            for key in (('user', username), ('client', client)):
+                tokens = self.tokens(key, now)
+                if tokens < 1:
+                    wait = max(wait, (1 - tokens) / self.limits[key[0]][1])
+            if wait:
+                return wait
+            key = ('client', client)
+            self.buckets[key] = [self.tokens(key, now) - 1, now]
+            return 0
+    
+    def failed(self, username):
+        """Charge a failed attempt to the username's bucket"""
+        now = time.monotonic()
+        with self.lock:
+            key = ('user', username)
+            self.buckets[key] = [max(0.0, self.tokens(key, now) - 1), now]
+    
+    def verify(self, user, password):
+        """True or False, or None when the pool is too busy to check in time"""
+        digest = hmac.new(self.secret, f"{user.username}\0{user.password_hash}\0{password}".encode(),
+                          hashlib.sha256).digest()
+        with self.lock:
+            expires_at = self.failed_digests.get(digest)
+            if expires_at is not None and expires_at > time.monotonic():
+                return False
+        
+        if not self.slots.acquire(blocking=False):
+            return None
+        try:
+            future = self.pool.submit(self.check, user.password_hash, password)
+        except RuntimeError:
+            self.slots.release()
+            raise
+        try:
+            verified = future.result(self.timeout)
+        except FutureTimeout:
+            return None
+        
+        if not verified:
+            with self.lock:
+                self.failed_digests[digest] = time.monotonic() + self.failed_ttl
+                self.failed_digests.move_to_end(digest)
+                while len(self.failed_digests) > self.max_entries:
+                    self.failed_digests.popitem(last=False)
+        return verified
+    
+    def check(self, password_hash, password):
+        try:
+            return check_password_hash(password_hash, password)
+        finally:
+            self.slots.release()
+
 class User(UserMixin):
     def __init__(self, id, username, password_hash, role):
         self.id = id
@@ -22,34 +218,1488 @@ class User(UserMixin):
         self.password_hash = password_hash
         self.role = role  # 'admin' or 'staff'
 
-class SimpleTableTracker:
-    def __init__(self):
-        # Snooker tables (existing rates)
-        self.snooker_tables = {
-            1: {"status": "idle", "time": "00:00", "rate": 3.0, "amount": 0.0, "start_time": None, "elapsed_seconds": 0, "sessions": []},
-            2: {"status": "idle", "time": "00:00", "rate": 4.0, "amount": 0.0, "start_time": None, "elapsed_seconds": 0, "sessions": []},
-            3: {"status": "idle", "time": "00:00", "rate": 4.5, "amount": 0.0, "start_time": None, "elapsed_seconds": 0, "sessions": []}
+class UserStore:
+    """Login accounts, persisted in the ledger and indexed in memory.
+    
+    Finding a user by username (done for every request by load_user) or
+    listing a role's users is a dict lookup. The admin user list is encoded
+    once per version for each viewing admin, since only can_remove differs
+    between viewers. Adding or removing a user bumps the version, which
+    follows the wall clock in milliseconds like table revisions, so it keeps
+    growing across restarts and differs between worker processes: a cached
+    listing's ETag never matches a different set of users.
+    """
+    
+    def __init__(self, ledger):
+        self.ledger = ledger
+        self.by_username = {}
+        self.by_role = {}  # role -> {username: User}
+        self.version = 0
+        self.listings = {}  # (viewer, role) -> JSON body for this version
+        self.lock = threading.Lock()
+    
+    def __len__(self):
+        return len(self.by_username)
+    
+    def get(self, username):
+        return self.by_username.get(username)
+    
+    def load(self):
+        """(Re)build the indexes from the ledger"""
+        users = [User(username, username, password_hash, role)
+                 for username, password_hash, role in self.ledger.load_users()]
+        with self.lock:
+            self.by_username = {user.username: user for user in users}
+            self.by_role = {}
+            for user in users:
+                self.by_role.setdefault(user.role, {})[user.username] = user
+            self.changed()
+    
+    def add(self, user):
+        """Persist and index a new user; False if the username is taken"""
+        with self.lock:
+            if user.username in self.by_username:
+                return False
+            self.ledger.save_user(user)
+            self.by_username[user.username] = user
+            self.by_role.setdefault(user.role, {})[user.username] = user
+            self.changed()
+        return True
+    
+    def remove(self, username):
+        """Delete a user, returning it, or None if there is no such user"""
+        with self.lock:
+            user = self.by_username.pop(username, None)
+            if user is None:
+                return None
+            self.ledger.delete_user(username)
+            del self.by_role[user.role][username]
+            self.changed()
+        return user
+    
+    def changed(self):
+        self.version = max(self.version + 1, int(time.time() * 1000))
+        self.listings = {}
+    
+    def listing(self, viewer, role=None):
+        """(version, JSON body) of /api/users as seen by the admin `viewer`"""
+        key = (viewer, role)
+        # Under the lock, so the body always matches the version it is cached and tagged with
+        with self.lock:
+            body = self.listings.get(key)
+            if body is None:
+                users = self.by_username.values() if role is None else self.by_role.get(role, {}).values()
+                body = json.dumps({
+                    "success": True,
+                    "version": self.version,
+                    "users": [{'username': user.username, 'role': user.role,
+                               'can_remove': user.username != viewer}  # Can't remove yourself
+                              for user in users],
+                }, separators=JSON_SEPARATORS)
+                self.listings[key] = body
+            return self.version, body
+
+class EventBroker:
+    """Fans state-change events out to Server-Sent Events subscribers"""
+    
+    def __init__(self, max_pending=100):
+        self.max_pending = max_pending
+        self.subscribers = {}
+        self.lock = threading.Lock()
+    
+    def subscribe(self, channel):
+        subscriber = queue.Queue(maxsize=self.max_pending)
+        with self.lock:
+            self.subscribers.setdefault(channel, set()).add(subscriber)
+        return subscriber
+    
+    def unsubscribe(self, channel, subscriber):
+        with self.lock:
+            self.subscribers.get(channel, set()).discard(subscriber)
+    
+    def publish(self, channel, event, data):
+        """Send an event to one channel, or to every channel when channel is None.
+        
+        data may be a str that is already JSON, so it is encoded once by the caller.
+        """
+        if not isinstance(data, str):
+            data = json.dumps(data)
+        message = f"event: {event}\ndata: {data}\n\n"
+        with self.lock:
+            if channel is None:
+                targets = [s for subs in self.subscribers.values() for s in subs]
+            else:
+                targets = list(self.subscribers.get(channel, ()))
+        
+        for subscriber in targets:
+            try:
+                subscriber.put_nowait(message)
+            except queue.Full:
+                # Slow client: drop its backlog and ask it to refetch full state
+                with subscriber.mutex:
+                    subscriber.queue.clear()
+                subscriber.put_nowait("event: resync\ndata: {}\n\n")
+
+class SessionLedger:
+    """Durable SQLite store for completed sessions, table rates and users.
+    
+    Runs in WAL mode so readers never wait on the writer. Writes are queued and
+    committed in batches by a background thread; the fixed SQL strings below are
+    reused so sqlite3 serves them from its prepared-statement cache.
+    """
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS sessions (
+            id INTEGER PRIMARY KEY,
+            game_type TEXT NOT NULL,
+            table_id INTEGER NOT NULL,
+            date TEXT NOT NULL,
+            start_time TEXT NOT NULL,
+            end_time TEXT NOT NULL,
+            duration REAL NOT NULL,
+            amount REAL NOT NULL,
+            user TEXT NOT NULL,
+            started_at REAL NOT NULL,
+            ended_at REAL NOT NULL,
+            cleared INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS idx_sessions_date ON sessions (date);
+        CREATE INDEX IF NOT EXISTS idx_sessions_table ON sessions (game_type, table_id, date);
+        CREATE INDEX IF NOT EXISTS idx_sessions_user ON sessions (user, date);
+        CREATE INDEX IF NOT EXISTS idx_sessions_open ON sessions (game_type, table_id, cleared);
+        CREATE INDEX IF NOT EXISTS idx_sessions_span ON sessions (game_type, table_id, started_at, ended_at);
+        
+        CREATE TABLE IF NOT EXISTS table_rates (
+            game_type TEXT NOT NULL,
+            table_id INTEGER NOT NULL,
+            rate REAL NOT NULL,
+            PRIMARY KEY (game_type, table_id)
+        );
+        
+        CREATE TABLE IF NOT EXISTS users (
+            username TEXT PRIMARY KEY,
+            password_hash TEXT NOT NULL,
+            role TEXT NOT NULL
+        );
+    """
+    
+    INSERT_SESSION = """
+        INSERT INTO sessions (game_type, table_id, date, start_time, end_time, duration, amount, user, started_at, ended_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+    # Inserts a session unless the same table already has one with the same start and end.
+    # Imported sessions are history: stored as cleared, so they never show on the live tables.
+    IMPORT_SESSION = """
+        INSERT INTO sessions (game_type, table_id, date, start_time, end_time, duration, amount, user, started_at, ended_at,
+                              cleared)
+        SELECT ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1
+        WHERE NOT EXISTS (
+            SELECT 1 FROM sessions WHERE game_type = ? AND table_id = ? AND started_at = ? AND ended_at = ?
+        )
+    """
+    CLEAR_SESSIONS = "UPDATE sessions SET cleared = 1 WHERE game_type = ? AND table_id = ? AND cleared = 0"
+    UPSERT_RATE = """
+        INSERT INTO table_rates (game_type, table_id, rate) VALUES (?, ?, ?)
+        ON CONFLICT (game_type, table_id) DO UPDATE SET rate = excluded.rate
+    """
+    INSERT_USER = "INSERT OR REPLACE INTO users (username, password_hash, role) VALUES (?, ?, ?)"
+    DELETE_USER = "DELETE FROM users WHERE username = ?"
+    
+    def __init__(self, path, batch_size=50, flush_interval=0.5):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(self.SCHEMA)
+        self.conn.commit()
+        
+        # conn_lock serializes use of the connection; pending_lock guards the queue
+        self.conn_lock = threading.Lock()
+        self.pending_lock = threading.Lock()
+        self.pending = []
+        self.wakeup = threading.Event()
+        
+        writer = threading.Thread(target=self.run_writer, name="ledger-writer")
+        writer.daemon = True
+        writer.start()
+        atexit.register(self.flush)
+    
+    def write(self, sql, params, sync=False):
+        """Queue a write; sync=True commits it (and everything before it) immediately"""
+        with self.pending_lock:
+            self.pending.append((sql, params))
+            batch_full = len(self.pending) >= self.batch_size
+        
+        if sync:
+            self.flush()
+        elif batch_full:
+            self.wakeup.set()
+    
+    def flush(self):
+        with self.conn_lock:
+            with self.pending_lock:
+                batch, self.pending = self.pending, []
+            if not batch:
+                return
+            
+            try:
+                with self.conn:
+                    # Consecutive writes of the same statement go through executemany
+                    for sql, group in itertools.groupby(batch, key=lambda item: item[0]):
+                        self.conn.executemany(sql, [params for _, params in group])
+            except sqlite3.OperationalError as e:
+                # Locked database, full disk and the like: keep the batch, ahead of anything
+                # queued since, and retry it with the next flush
+                logger.error("ledger_write_deferred statements=%d error=%s", len(batch), e)
+                with self.pending_lock:
+                    self.pending[:0] = batch
+            except sqlite3.Error as e:
+                # A statement the database rejects would fail every retry: commit the rest
+                # one by one so only the rejected writes are lost
+                logger.error("ledger_write_failed statements=%d error=%s", len(batch), e)
+                for position, (sql, params) in enumerate(batch):
+                    try:
+                        with self.conn:
+                            self.conn.execute(sql, params)
+                    except sqlite3.OperationalError:
+                        with self.pending_lock:
+                            self.pending[:0] = batch[position:]
+                        return
+                    except sqlite3.Error as e:
+                        # Not the params: user writes carry password hashes
+                        logger.error("ledger_write_dropped sql=%r error=%s", ' '.join(sql.split()), e)
+    
+    def run_writer(self):
+        while True:
+            self.wakeup.wait(self.flush_interval)
+            self.wakeup.clear()
+            self.flush()
+    
+    def query(self, sql, params=()):
+        with self.conn_lock:
+            return self.conn.execute(sql, params).fetchall()
+    
+    @staticmethod
+    def session_params(game_type, table_id, session):
+        """INSERT_SESSION parameters for a session"""
+        row = session.as_dict()
+        return (game_type, table_id, row['date'], row['start_time'], row['end_time'],
+                row['duration'], row['amount'], row['user'], session.started_at, session.ended_at)
+    
+    def record_session(self, game_type, table_id, session, sync=False):
+        self.write(self.INSERT_SESSION, self.session_params(game_type, table_id, session), sync=sync)
+    
+    def import_sessions(self, sessions, batch_size=5000):
+        """Bulk-insert (game_type, table_id, SessionRecord) tuples as cleared
+        sessions, skipping any already stored for the same table, start and end.
+        Commits once per batch; returns how many were inserted."""
+        self.flush()
+        inserted = 0
+        sessions = iter(sessions)
+        while True:
+            batch = list(itertools.islice(sessions, batch_size))
+            if not batch:
+                return inserted
+            params = []
+            for game_type, table_id, session in batch:
+                row = session.as_dict()
+                params.append((game_type, table_id, row['date'], row['start_time'], row['end_time'],
+                               row['duration'], row['amount'], row['user'], session.started_at, session.ended_at,
+                               game_type, table_id, session.started_at, session.ended_at))
+            with self.conn_lock:
+                before = self.conn.total_changes
+                with self.conn:
+                    self.conn.executemany(self.IMPORT_SESSION, params)
+                inserted += self.conn.total_changes - before
+    
+    def clear_sessions(self, game_type, table_id):
+        self.write(self.CLEAR_SESSIONS, (game_type, table_id))
+    
+    def save_rate(self, game_type, table_id, rate):
+        self.write(self.UPSERT_RATE, (game_type, table_id, rate), sync=True)
+    
+    def save_user(self, user):
+        self.write(self.INSERT_USER, (user.username, user.password_hash, user.role), sync=True)
+    
+    def delete_user(self, username):
+        self.write(self.DELETE_USER, (username,), sync=True)
+    
+    def load_rates(self):
+        return self.query("SELECT game_type, table_id, rate FROM table_rates")
+    
+    def load_open_sessions(self, since=0):
+        """Sessions ended at or after `since` that have not been cleared from the table view, oldest first"""
+        return self.query("""
+            SELECT game_type, table_id, started_at, ended_at, duration, amount, user
+            FROM sessions WHERE cleared = 0 AND ended_at >= ? ORDER BY id
+        """, (since,))
+    
+    def first_ended_at(self, before):
+        """Earliest session end before `before`, or None"""
+        self.flush()
+        return self.query("SELECT MIN(ended_at) FROM sessions WHERE ended_at < ?", (before,))[0][0]
+    
+    def load_sessions_between(self, start, end):
+        """Every session, cleared or not, ended in [start, end), oldest first"""
+        self.flush()
+        return self.query("""
+            SELECT game_type, table_id, started_at, ended_at, duration, amount, user, cleared
+            FROM sessions WHERE ended_at >= ? AND ended_at < ? ORDER BY id
+        """, (start, end))
+    
+    def load_sessions(self, game_type, table_id, before=None, date_from=None, date_to=None,
+                      include_cleared=False, limit=50, after=None):
+        """One page of a table's sessions, newest first.
+        
+        Rows are (id, started_at, ended_at, duration, amount, user); pass the last
+        id as `before` for the next page, or the newest id already held as `after`
+        for just the sessions since. Queued writes are committed first so a
+        session ended a moment ago is already listed.
+        """
+        self.flush()
+        conditions = ["game_type = ?", "table_id = ?"]
+        params = [game_type, table_id]
+        if not include_cleared:
+            conditions.append("cleared = 0")
+        if before is not None:
+            conditions.append("id < ?")
+            params.append(before)
+        if after is not None:
+            conditions.append("id > ?")
+            params.append(after)
+        if date_from is not None:
+            conditions.append("date >= ?")
+            params.append(date_from)
+        if date_to is not None:
+            conditions.append("date <= ?")
+            params.append(date_to)
+        params.append(limit)
+        return self.query(f"""
+            SELECT id, started_at, ended_at, duration, amount, user
+            FROM sessions WHERE {' AND '.join(conditions)} ORDER BY id DESC LIMIT ?
+        """, params)
+    
+    EXPORT_COLUMNS = ('id', 'game_type', 'table_id', 'date', 'start_time', 'end_time', 'duration',
+                      'amount', 'user', 'started_at', 'ended_at', 'cleared')
+    
+    def iter_sessions(self, date_from, date_to, batch_size=1000):
+        """Every session dated within [date_from, date_to] in id order, as EXPORT_COLUMNS rows.
+        
+        Fetched in keyset-paged batches, so memory stays flat however long the
+        range and the connection is only held for one batch at a time.
+        """
+        self.flush()
+        sql = f"""
+            SELECT {', '.join(self.EXPORT_COLUMNS)} FROM sessions
+            WHERE id > ? AND date >= ? AND date <= ? ORDER BY id LIMIT ?
+        """
+        last_id = 0
+        while True:
+            rows = self.query(sql, (last_id, date_from, date_to, batch_size))
+            if not rows:
+                return
+            yield rows
+            last_id = rows[-1][0]
+    
+    def load_users(self):
+        return self.query("SELECT username, password_hash, role FROM users")
+
+class StateJournal:
+    """Append-only, fsync'd journal of table transitions.
+    
+    Each line is the full hot state of one table after a transition, with the
+    current run anchored to wall-clock time so it can be resumed after a restart.
+    Replaying keeps the last line per table; the file is compacted on boot and
+    whenever it grows past max_records.
+    """
+    
+    def __init__(self, path, max_records=1000):
+        self.path = path
+        self.max_records = max_records
+        self.lock = threading.Lock()
+        self.records = 0
+        self.file = None
+    
+    def replay(self):
+        """Latest journaled state per (game_type, table_id)"""
+        states = {}
+        if not os.path.exists(self.path):
+            return states
+        
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Torn final write from a crash
+                    continue
+                states[(record['game_type'], record['table_id'])] = record
+        return states
+    
+    def compact(self, snapshot):
+        """Atomically replace the journal with the records snapshot() returns.
+        
+        The snapshot is taken under the journal lock, so a transition another
+        table appends meanwhile is either in it or appended after it.
+        """
+        with self.lock:
+            records = snapshot()
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for record in records:
+                    f.write(json.dumps(record) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            
+            if self.file:
+                self.file.close()
+            os.replace(tmp_path, self.path)
+            self.file = open(self.path, 'a', encoding='utf-8')
+            self.records = len(records)
+    
+    def append(self, record):
+        """Durably append a record; returns True when the journal wants compacting"""
+        with self.lock:
+            if self.file is None:
+                self.file = open(self.path, 'a', encoding='utf-8')
+            self.file.write(json.dumps(record) + '\n')
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.records += 1
+            return self.records > self.max_records
+
+
+class LocalStateBackend:
+    """Table state owned by a single process.
+    
+    Writers take the table's in-process lock, and the StateJournal makes
+    running tables survive a restart.
+    """
+    
+    def __init__(self, tracker, journal_path):
+        self.tracker = tracker
+        self.journal = StateJournal(journal_path)
+    
+    def initial_revision(self, seed):
+        return seed
+    
+    def lock(self, game_type, table_id):
+        return self.tracker.table_locks[(game_type, table_id)]
+    
+    def next_revision(self, revision):
+        return revision + 1
+    
+    def save(self, game_type, table_id, table):
+        if self.journal.append(self.tracker.get_journal_record(game_type, table_id, table)):
+            self.journal.compact(self.tracker.get_journal_records)
+    
+    def record_session(self, game_type, table_id, session):
+        # Committed before the idle table is journaled, so a crash in between can't lose it
+        self.tracker.ledger.record_session(game_type, table_id, session, sync=True)
+    
+    def clear_sessions(self, game_type, table_id):
+        self.tracker.ledger.clear_sessions(game_type, table_id)
+    
+    def restore(self):
+        return self.journal.replay()
+    
+    def restored(self):
+        self.journal.compact(self.tracker.get_journal_records)
+    
+    def users_changed(self):
+        pass
+    
+    def start(self):
+        pass
+
+
+class SQLiteStateBackend:
+    """Table state shared by several worker processes through the SQLite database.
+    
+    The latest record of every table lives in table_state, and a global revision
+    counter lives in state_meta. A writer holds the table's in-process lock and
+    a BEGIN IMMEDIATE transaction, which serializes writers across processes.
+    It first pulls in any newer version of the table from another worker. A
+    watcher thread polls PRAGMA data_version, which costs no disk read, and
+    installs other workers' commits. Each worker keeps serving reads from its
+    own memory.
+    """
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS table_state (
+            game_type TEXT NOT NULL,
+            table_id INTEGER NOT NULL,
+            rev INTEGER NOT NULL,
+            record TEXT NOT NULL,
+            PRIMARY KEY (game_type, table_id)
+        );
+        CREATE INDEX IF NOT EXISTS idx_table_state_rev ON table_state (rev);
+        
+        CREATE TABLE IF NOT EXISTS state_meta (
+            key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        );
+        INSERT OR IGNORE INTO state_meta (key, value) VALUES ('revision', 0), ('users', 0);
+    """
+    
+    UPSERT_STATE = """
+        INSERT INTO table_state (game_type, table_id, rev, record) VALUES (?, ?, ?, ?)
+        ON CONFLICT (game_type, table_id) DO UPDATE SET rev = excluded.rev, record = excluded.record
+    """
+    
+    def __init__(self, tracker, path, poll_interval=0.05):
+        self.tracker = tracker
+        self.poll_interval = poll_interval
+        
+        # Autocommit mode: transactions are opened explicitly with BEGIN IMMEDIATE
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=FULL")
+        self.conn.executescript(self.SCHEMA)
+        self.conn_lock = threading.RLock()
+        self.seen_revision = 0
+        self.users_version = self.read_meta('users')
+    
+    def read_meta(self, key):
+        return self.conn.execute("SELECT value FROM state_meta WHERE key = ?", (key,)).fetchone()[0]
+    
+    def initial_revision(self, seed):
+        """The shared revision, seeded on first use so it continues past single-process revisions"""
+        with self.conn_lock:
+            self.conn.execute("UPDATE state_meta SET value = ? WHERE key = 'revision' AND value = 0", (seed,))
+            self.seen_revision = self.read_meta('revision')
+        return self.seen_revision
+    
+    @contextmanager
+    def lock(self, game_type, table_id):
+        with self.tracker.table_locks[(game_type, table_id)], self.conn_lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self.conn.execute("SELECT rev, record FROM table_state WHERE game_type = ? AND table_id = ?",
+                                        (game_type, table_id)).fetchone()
+                if row and row[0] > self.tracker.tables[game_type][table_id].rev:
+                    self.tracker.install_table(game_type, table_id, json.loads(row[1]), row[0])
+                yield
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+    
+    def next_revision(self, revision):
+        """Next shared revision; called inside lock()'s transaction"""
+        self.conn.execute("UPDATE state_meta SET value = MAX(value + 1, ?) WHERE key = 'revision'", (revision + 1,))
+        return self.read_meta('revision')
+    
+    def save(self, game_type, table_id, table):
+        record = self.tracker.get_state_record(game_type, table_id, table)
+        self.conn.execute(self.UPSERT_STATE, (game_type, table_id, table.rev, json.dumps(record, separators=JSON_SEPARATORS)))
+    
+    # Session writes go into lock()'s transaction, which holds the database write lock, so
+    # they commit together with the table's state. The ledger's own connection would wait
+    # on that lock, and a clear it queued could land after a later session.
+    
+    def record_session(self, game_type, table_id, session):
+        self.conn.execute(SessionLedger.INSERT_SESSION, SessionLedger.session_params(game_type, table_id, session))
+    
+    def clear_sessions(self, game_type, table_id):
+        self.conn.execute(SessionLedger.CLEAR_SESSIONS, (game_type, table_id))
+    
+    def restore(self):
+        with self.conn_lock:
+            rows = self.conn.execute("SELECT game_type, table_id, rev, record FROM table_state").fetchall()
+        return {(game_type, table_id): dict(json.loads(record), rev=rev) for game_type, table_id, rev, record in rows}
+    
+    def restored(self):
+        pass
+    
+    def users_changed(self):
+        with self.conn_lock:
+            self.conn.execute("UPDATE state_meta SET value = value + 1 WHERE key = 'users'")
+            self.users_version = self.read_meta('users')
+    
+    def start(self):
+        watcher = threading.Thread(target=self.watch, name="state-watcher")
+        watcher.daemon = True
+        watcher.start()
+    
+    def watch(self):
+        data_version = None
+        while True:
+            time.sleep(self.poll_interval)
+            try:
+                with self.conn_lock:
+                    # Changes whenever another connection commits to the database
+                    current = self.conn.execute("PRAGMA data_version").fetchone()[0]
+                    if current == data_version:
+                        continue
+                    data_version = current
+                    rows = self.conn.execute("SELECT game_type, table_id, rev, record FROM table_state WHERE rev > ?",
+                                             (self.seen_revision,)).fetchall()
+                    users_version = self.read_meta('users')
+                
+                for game_type, table_id, rev, record in rows:
+                    self.seen_revision = max(self.seen_revision, rev)
+                    if table_id not in self.tracker.tables.get(game_type, {}):
+                        continue
+                    with self.tracker.table_locks[(game_type, table_id)]:
+                        if rev > self.tracker.tables[game_type][table_id].rev:
+                            self.tracker.install_table(game_type, table_id, json.loads(record), rev)
+                
+                if users_version != self.users_version:
+                    self.users_version = users_version
+                    self.tracker.reload_users()
+            except Exception:
+                logger.exception("state_watch_failed")
+
+class SessionArchive:
+    """Closed business days of sessions as compressed, write-once daily segments.
+    
+    Each day is one archive/<YYYY-MM-DD>.jsonl.gz file with a JSON line per
+    session. Business days run from rollover_hour to rollover_hour local time,
+    so a session ending after midnight counts towards the evening it started.
+    Segments are written to a temp file and renamed into place, and never
+    change afterwards.
+    """
+    
+    DATE_PATTERN = re.compile(r'^(\d{4}-\d{2}-\d{2})\.jsonl\.gz$')
+    
+    def __init__(self, path, rollover_hour=6):
+        self.path = path
+        self.rollover_hour = rollover_hour
+        os.makedirs(path, exist_ok=True)
+    
+    def day_start(self, epoch, days=0):
+        """Epoch time the business day containing `epoch` starts, shifted by `days`"""
+        local = time.localtime(epoch - self.rollover_hour * 3600)
+        return time.mktime((local.tm_year, local.tm_mon, local.tm_mday + days, self.rollover_hour, 0, 0, 0, 0, -1))
+    
+    def business_date(self, epoch):
+        return time.strftime("%Y-%m-%d", time.localtime(epoch - self.rollover_hour * 3600))
+    
+    def segment_path(self, date):
+        return os.path.join(self.path, f"{date}.jsonl.gz")
+    
+    def days(self):
+        """Archived business dates, oldest first"""
+        return sorted(match.group(1) for match in map(self.DATE_PATTERN.match, os.listdir(self.path)) if match)
+    
+    def has_day(self, date):
+        return os.path.exists(self.segment_path(date))
+    
+    def write_day(self, date, lines):
+        path = self.segment_path(date)
+        # Per-process temp name: every worker process may archive the same day
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as raw:
+            with gzip.GzipFile(fileobj=raw, mode='wb') as f:
+                for line in lines:
+                    f.write(line.encode() + b'\n')
+            raw.flush()
+            os.fsync(raw.fileno())
+        os.replace(tmp_path, path)
+    
+    def archive_day(self, ledger, start):
+        """(Re)write the business day starting at `start` from the ledger; returns the
+        number of sessions archived, and writes nothing for a day without any"""
+        rows = ledger.load_sessions_between(start, self.day_start(start, days=1))
+        if rows:
+            self.write_day(self.business_date(start), (self.session_line(*row) for row in rows))
+        return len(rows)
+    
+    @staticmethod
+    def session_line(game_type, table_id, started_at, ended_at, duration, amount, user, cleared):
+        session = SessionRecord.from_ledger(started_at, ended_at, duration, amount, user)
+        return dumps_with({
+            "game_type": game_type,
+            "table_id": table_id,
+            "started_at": session.started_at,
+            "ended_at": session.ended_at,
+            "cleared": bool(cleared)
+        }, "session", session.to_json())
+    
+    def version(self):
+        """Changes whenever a day is archived or rewritten: both rename a file into the directory"""
+        return os.stat(self.path).st_mtime_ns
+    
+    def read_day(self, date):
+        """JSON lines of an archived day, or None when it is not archived"""
+        try:
+            with gzip.open(self.segment_path(date), 'rt', encoding='utf-8') as f:
+                return f.read().splitlines()
+        except FileNotFoundError:
+            return None
+
+
+class AuditLog:
+    """Append-only record of who did what to which table or user.
+    
+    Entries are JSON lines in one audit/<YYYY-MM-DD>.jsonl segment per local
+    calendar day. record() only queues an entry, so actions
+    never wait on the disk. A writer thread appends the queue in batches. The
+    fsync policy decides durability:
+    - 'batch' syncs once per batch;
+    - 'always' also makes record() wait until its entry is synced;
+    - 'off' leaves syncing to the OS.
+    
+    To query, the segments covering the range are chosen from their names.
+    Each segment has an in-memory index of entry times, byte offsets and each
+    user's entries, so only the matching lines are read back. An index picks
+    up from where it stopped, which covers lines appended since, including by
+    other worker processes. Their batches interleave, so file order is only
+    roughly time order; the index keeps its positions sorted by time.
+    """
+    
+    FSYNC_POLICIES = ('always', 'batch', 'off')
+    SEGMENT_PATTERN = re.compile(r'^(\d{4}-\d{2}-\d{2})\.jsonl$')
+    
+    def __init__(self, path, fsync='batch', flush_interval=0.2, max_indexes=62):
+        if fsync not in self.FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {', '.join(self.FSYNC_POLICIES)}")
+        self.path = path
+        self.fsync = fsync
+        self.flush_interval = flush_interval
+        os.makedirs(path, exist_ok=True)
+        
+        # pending_lock guards the queue; write_lock serializes appends
+        self.pending_lock = threading.Lock()
+        self.write_lock = threading.Lock()
+        self.pending = []
+        self.wakeup = threading.Event()
+        self.segment = (None, None)  # (date, open file) being appended to
+        
+        # date -> [indexed bytes, times, offsets, positions by time, {user: [positions by time]}],
+        # least recently used first
+        self.indexes = OrderedDict()
+        self.max_indexes = max_indexes
+        self.index_lock = threading.Lock()
+        
+        writer = threading.Thread(target=self.run_writer, name="audit-writer")
+        writer.daemon = True
+        writer.start()
+        atexit.register(self.flush)
+    
+    def segment_path(self, date):
+        return os.path.join(self.path, f"{date}.jsonl")
+    
+    def record(self, user, action, game_type=None, table_id=None, **details):
+        """Queue an entry stamped with the current time"""
+        entry = {"at": 0, "user": user, "action": action}
+        if game_type is not None:
+            entry["game_type"] = game_type
+            entry["table_id"] = table_id
+        entry.update(details)
+        with self.pending_lock:
+            # Stamped under the queue lock so entries are appended in time order
+            entry["at"] = round(time.time(), 3)
+            self.pending.append(entry)
+        
+        if self.fsync == 'always':
+            self.flush()
+    
+    def flush(self):
+        with self.write_lock:
+            with self.pending_lock:
+                batch, self.pending = self.pending, []
+            if not batch:
+                return
+            
+            written = 0
+            try:
+                for date, entries in itertools.groupby(
+                        batch, key=lambda entry: time.strftime("%Y-%m-%d", time.localtime(entry["at"]))):
+                    entries = list(entries)
+                    f = self.open_segment(date)
+                    f.write(''.join(json.dumps(entry, separators=JSON_SEPARATORS) + '\n' for entry in entries).encode())
+                    f.flush()
+                    if self.fsync != 'off':
+                        os.fsync(f.fileno())
+                    written += len(entries)
+            except OSError as e:
+                # Full disk and the like: keep what wasn't written, ahead of anything queued
+                # since, and retry it with the next flush
+                logger.error("audit_write_deferred entries=%d error=%s", len(batch) - written, e)
+                self.close_segment()
+                with self.pending_lock:
+                    self.pending[:0] = batch[written:]
+    
+    def close_segment(self):
+        f = self.segment[1]
+        self.segment = (None, None)
+        if f is not None:
+            try:
+                f.close()
+            except OSError:
+                pass
+    
+    def open_segment(self, date):
+        current, f = self.segment
+        if current != date:
+            if f is not None:
+                f.close()
+            # O_APPEND: whole-batch writes from several worker processes never overwrite each other
+            f = open(self.segment_path(date), 'ab', buffering=0)
+            self.segment = (date, f)
+            # End a line torn by a failed write, so the next entry starts on a line of its own
+            if f.tell():
+                with open(self.segment_path(date), 'rb') as tail:
+                    tail.seek(-1, os.SEEK_END)
+                    if tail.read(1) != b'\n':
+                        f.write(b'\n')
+        return f
+    
+    def run_writer(self):
+        while True:
+            self.wakeup.wait(self.flush_interval)
+            self.wakeup.clear()
+            self.flush()
+    
+    def dates(self):
+        """Dates with a segment, oldest first"""
+        return sorted(match.group(1) for match in map(self.SEGMENT_PATTERN.match, os.listdir(self.path)) if match)
+    
+    def index(self, date):
+        """The segment's index, extended over any lines appended since. Callers hold index_lock."""
+        index = self.indexes.get(date)
+        if index is None:
+            index = self.indexes[date] = [0, [], [], [], {}]
+            while len(self.indexes) > self.max_indexes:
+                self.indexes.popitem(last=False)
+        self.indexes.move_to_end(date)
+        
+        offset, times, offsets, order, users = index
+        indexed, touched = len(times), set()
+        with open(self.segment_path(date), 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    # A write still in progress; index it next time
+                    break
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Torn write from a crash
+                    entry = None
+                if entry is not None:
+                    users.setdefault(entry["user"], []).append(len(times))
+                    touched.add(entry["user"])
+                    order.append(len(times))
+                    times.append(entry["at"])
+                    offsets.append(offset)
+                offset += len(line)
+        index[0] = offset
+        
+        if len(times) > indexed:
+            # Each worker's batches are in time order, so this merges a few sorted runs.
+            # Stable, so entries with the same time stay in file order.
+            order.sort(key=times.__getitem__)
+            for name in touched:
+                users[name].sort(key=times.__getitem__)
+        return index
+    
+    def query(self, start, end, user=None, game_type=None, table_id=None, action=None, limit=500):
+        """Entries at or after `start` and before `end`, oldest first, and whether more matched than `limit`"""
+        self.flush()
+        first = time.strftime("%Y-%m-%d", time.localtime(start))
+        last = time.strftime("%Y-%m-%d", time.localtime(end))
+        
+        found = []
+        with self.index_lock:
+            for date in self.dates():
+                if not first <= date <= last:
+                    continue
+                _, times, offsets, order, users = self.index(date)
+                positions = users.get(user, []) if user is not None else order
+                begin = bisect.bisect_left(positions, start, key=times.__getitem__)
+                stop = bisect.bisect_left(positions, end, key=times.__getitem__)
+                
+                with open(self.segment_path(date), 'rb') as f:
+                    for position in positions[begin:stop]:
+                        f.seek(offsets[position])
+                        entry = json.loads(f.readline())
+                        if ((game_type is None or entry.get("game_type") == game_type)
+                                and (table_id is None or entry.get("table_id") == table_id)
+                                and (action is None or entry["action"] == action)):
+                            if len(found) == limit:
+                                return found, True
+                            found.append(entry)
+        return found, False
+
+
+def clock_time(local):
+    return f"{local.tm_hour:02d}:{local.tm_min:02d}:{local.tm_sec:02d}"
+
+
+# "MM:SS" for every second of an hour, and "HH:" for every hour of a day
+MINUTE_SECOND = [f"{second // 60:02d}:{second % 60:02d}" for second in range(3600)]
+HOUR = [f"{hour:02d}:" for hour in range(24)]
+
+
+@lru_cache(maxsize=4096)
+def utc_day_offset(day):
+    """The local zone's UTC offset in seconds throughout UTC day `day` (epoch // 86400),
+    or None when it changes during that day"""
+    offset = time.localtime(day * 86400).tm_gmtoff
+    return offset if time.localtime(day * 86400 + 86399).tm_gmtoff == offset else None
+
+
+@lru_cache(maxsize=4096)
+def day_date(day):
+    """YYYY-MM-DD of the day `day` days after 1970-01-01"""
+    return time.strftime("%Y-%m-%d", time.gmtime(day * 86400))
+
+
+def local_date_time(epoch):
+    """(YYYY-MM-DD, HH:MM:SS) in local time for integer epoch seconds.
+    
+    The zone offset is looked up once per day, so only sessions on the day of a
+    DST change need a localtime() call of their own.
+    """
+    offset = utc_day_offset(epoch // 86400)
+    if offset is None:
+        local = time.localtime(epoch)
+        return f"{local.tm_year:04d}-{local.tm_mon:02d}-{local.tm_mday:02d}", clock_time(local)
+    day, second = divmod(epoch + offset, 86400)
+    return day_date(day), HOUR[second // 3600] + MINUTE_SECOND[second % 3600]
+
+
+class SessionRecord:
+    """A completed session: epoch seconds, billed seconds and the amount in paise.
+    
+    The display strings clients expect (start/end time, date, rupees) are derived
+    when serialized instead of being stored on every record.
+    """
+    
+    __slots__ = ('started_at', 'ended_at', 'seconds', 'amount_paise', 'user')
+    
+    def __init__(self, started_at, ended_at, seconds, amount_paise, user):
+        self.started_at = int(started_at)
+        self.ended_at = int(ended_at)
+        self.seconds = int(seconds)
+        self.amount_paise = int(amount_paise)
+        self.user = sys.intern(user)
+    
+    @classmethod
+    def from_ledger(cls, started_at, ended_at, duration, amount, user):
+        """Record for a ledger row, which stores minutes and rupees"""
+        return cls(started_at, ended_at, round(duration * 60), round(amount * 100), user)
+    
+    @property
+    def duration(self):
+        """Billed minutes, to one decimal"""
+        return round(self.seconds / 60, 1)
+    
+    @property
+    def amount(self):
+        """Amount in rupees"""
+        return self.amount_paise / 100
+    
+    def as_dict(self):
+        start_time = local_date_time(self.started_at)[1]
+        date, end_time = local_date_time(self.ended_at)
+        return {
+            "start_time": start_time,
+            "end_time": end_time,
+            "duration": self.duration,
+            "amount": self.amount,
+            "date": date,
+            "user": self.user
         }
+    
+    def to_json(self):
+        return json.dumps(self.as_dict(), separators=JSON_SEPARATORS)
+
+
+def legacy_sessions(dump):
+    """(game_type, table_id, SessionRecord) tuples from a pool/Snooker V2.html export.
+    
+    Those pages kept one localStorage record per table, {"sessions": [{"timeline":
+    "HH:MM:SS > HH:MM:SS", "amount": 12.5, "date": "YYYY-MM-DD"}], ...}. A
+    session's date is the local date it ended, or for sessions saved before the
+    pages recorded one, the date of their first export. Exports from older pages
+    have no dates at all, so their sessions are placed on the export's date. A
+    start later than the end means the session began the day before.
+    """
+    game_type = dump['game_type']
+    
+    def epoch(date, clock, days=0):
+        year, month, day = map(int, date.split('-'))
+        hour, minute, second = map(int, clock.strip().split(':'))
+        # Some browsers format midnight as 24:00:00
+        return int(time.mktime((year, month, day + days, hour % 24, minute, second, 0, 0, -1)))
+    
+    for table_key, record in dump['tables'].items():
+        table_id = int(table_key)
+        for entry in (record or {}).get('sessions', []):
+            date = entry.get('date', dump['date'])
+            start, end = entry['timeline'].split('>')
+            ended_at = epoch(date, end)
+            started_at = epoch(date, start)
+            if started_at > ended_at:
+                started_at = epoch(date, start, days=-1)
+            yield game_type, table_id, SessionRecord(started_at, ended_at, ended_at - started_at,
+                                                     round(float(entry['amount']) * 100), 'legacy')
+
+
+class TableState:
+    """Live state of one table.
+    
+    run_started is a time.monotonic() value; session_started_at is epoch seconds.
+    Installed instances are never mutated: writers copy(), change the copy and
+    commit it, so readers need no lock.
+    """
+    
+    __slots__ = ('status', 'rate', 'accumulated_seconds', 'run_started', 'session_started_at', 'sessions', 'rev')
+    
+    def __init__(self, rate, status='idle', accumulated_seconds=0.0, run_started=None,
+                 session_started_at=None, sessions=(), rev=0):
+        self.status = status
+        self.rate = rate
+        self.accumulated_seconds = accumulated_seconds
+        self.run_started = run_started
+        self.session_started_at = session_started_at
+        self.sessions = sessions
+        self.rev = rev
+    
+    def copy(self):
+        return TableState(self.rate, self.status, self.accumulated_seconds, self.run_started,
+                          self.session_started_at, self.sessions, self.rev)
+    
+    def elapsed(self, now=None):
+        """Billable seconds so far"""
+        elapsed = self.accumulated_seconds
+        if self.status == 'running' and self.run_started is not None:
+            elapsed += (now if now is not None else time.monotonic()) - self.run_started
+        return elapsed
+    
+    def wall_started_at(self, now, wall_now):
+        """Epoch time the current run started, or None when not running"""
+        if self.status == 'running' and self.run_started is not None:
+            return wall_now - (now - self.run_started)
+        return None
+    
+    def to_json(self, now, wall_now):
+        """Public view of the table as compact JSON.
+        
+        Only values that change with a commit go in, so the encoding stays valid
+        for the whole table revision: clients compute time and amount from
+        accumulated_seconds, started_at and rate. Session history is left out so
+        the size stays constant all day; only the count and the latest session
+        go in, and clients page through the rest from the sessions endpoint.
+        """
+        started_at = self.wall_started_at(now, wall_now)
+        session_start_time = 'null'
+        if self.session_started_at is not None:
+            session_start_time = f'"{clock_time(time.localtime(self.session_started_at))}"'
+        last_session = self.sessions[-1].to_json() if self.sessions else 'null'
+        return (f'{{"status":"{self.status}","rate":{self.rate!r},'
+                f'"accumulated_seconds":{round(self.accumulated_seconds, 3)!r},'
+                f'"started_at":{"null" if started_at is None else repr(round(started_at, 3))},'
+                f'"rev":{self.rev},"session_start_time":{session_start_time},'
+                f'"session_count":{len(self.sessions)},"last_session":{last_session}}}')
+
+
+class RevenueStats:
+    """Running takings and usage for the current business day.
+    
+    Every bucket is [sessions, billed seconds, paise], kept per table, game,
+    staff user and local hour the session ended, plus a grand total. record()
+    touches a fixed number of buckets, so /api/stats never rescans history.
+    The totals start over on their own with the first session or read after
+    the business day closes.
+    """
+    
+    def __init__(self, day_start):
+        # day_start(epoch, days=0) gives business day boundaries, as SessionArchive.day_start
+        self.day_start = day_start
+        self.lock = threading.Lock()
+        self.start_day(time.time())
+    
+    def start_day(self, epoch):
+        self.opened_at = self.day_start(epoch)
+        self.closes_at = self.day_start(epoch, days=1)
+        self.total = [0, 0, 0]
+        self.tables = {}
+        self.games = {}
+        self.users = {}
+        self.hours = {}
+    
+    def record(self, game_type, table_id, session):
+        with self.lock:
+            if session.ended_at >= self.closes_at:
+                self.start_day(session.ended_at)
+            elif session.ended_at < self.opened_at:
+                return
+            
+            hour = time.localtime(session.ended_at).tm_hour
+            for bucket in (self.total,
+                           self.tables.setdefault((game_type, table_id), [0, 0, 0]),
+                           self.games.setdefault(game_type, [0, 0, 0]),
+                           self.users.setdefault(session.user, [0, 0, 0]),
+                           self.hours.setdefault(hour, [0, 0, 0])):
+                bucket[0] += 1
+                bucket[1] += session.seconds
+                bucket[2] += session.amount_paise
+    
+    def as_dict(self, table_counts, now=None):
+        """Public view; utilization is billed time over time open so far today"""
+        now = now if now is not None else time.time()
+        with self.lock:
+            if now >= self.closes_at:
+                self.start_day(now)
+            open_seconds = max(1.0, now - self.opened_at)
+            
+            def view(bucket, tables=None):
+                sessions, seconds, paise = bucket
+                entry = {"sessions": sessions, "minutes": round(seconds / 60, 1), "amount": paise / 100}
+                if tables is not None:
+                    entry["utilization"] = round(min(1.0, seconds / (open_seconds * tables)), 4)
+                return entry
+            
+            empty = [0, 0, 0]
+            return {
+                "business_day": time.strftime("%Y-%m-%d", time.localtime(self.opened_at)),
+                "opened_at": self.opened_at,
+                "total": view(self.total, sum(table_counts.values())),
+                "games": {game_type: view(self.games.get(game_type, empty), count)
+                          for game_type, count in table_counts.items()},
+                "tables": {game_type: {str(table_id): view(self.tables.get((game_type, table_id), empty), 1)
+                                       for table_id in range(1, count + 1)}
+                           for game_type, count in table_counts.items()},
+                "users": {user: view(bucket) for user, bucket in sorted(self.users.items())},
+                "hours": {f"{hour:02d}": view(bucket) for hour, bucket in sorted(self.hours.items())}
+            }
+
+
+class SessionAnalytics:
+    """Historical reports over archived sessions, computed on NumPy columns.
+    
+    Sessions are loaded once into parallel arrays (start/end epoch, billed
+    seconds, paise, and integer codes for game, table and user); every report
+    is a handful of vectorized group-bys over those arrays. NumPy is only
+    needed here, so it is imported lazily.
+    """
+    
+    WEEKDAYS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+    
+    def __init__(self, rows):
+        """rows: (game_type, table_id, started_at, ended_at, seconds, amount_paise, user) tuples"""
+        np = self.numpy()
+        self.np = np
+        games, table_ids, started, ended, seconds, paise, users = zip(*rows) if rows else ((),) * 7
+        
+        self.game_names, game_codes = np.unique(np.array(games, dtype=str), return_inverse=True)
+        self.user_names, user_codes = np.unique(np.array(users, dtype=str), return_inverse=True)
+        self.game = game_codes.astype(np.int16)
+        self.user = user_codes.astype(np.int32)
+        self.table = np.array(table_ids, dtype=np.int32)
+        self.started_at = np.array(started, dtype=np.int64)
+        self.ended_at = np.array(ended, dtype=np.int64)
+        self.seconds = np.array(seconds, dtype=np.int64)
+        self.paise = np.array(paise, dtype=np.int64)
+        self.utc_offset = self.local_offsets(self.started_at)
+    
+    @staticmethod
+    def numpy():
+        try:
+            import numpy
+        except ImportError:
+            raise RuntimeError("Analytics needs NumPy: pip install numpy")
+        return numpy
+    
+    @classmethod
+    def from_archive(cls, archive, date_from=None, date_to=None):
+        rows = []
+        for date in archive.days():
+            if (date_from and date < date_from) or (date_to and date > date_to):
+                continue
+            for line in archive.read_day(date):
+                entry = json.loads(line)
+                session = entry['session']
+                rows.append((entry['game_type'], entry['table_id'], entry['started_at'], entry['ended_at'],
+                             round(session['duration'] * 60), round(session['amount'] * 100), session['user']))
+        return cls(rows)
+    
+    def local_offsets(self, epochs):
+        """Local UTC offset per epoch, looked up once per distinct UTC day"""
+        np = self.np
+        days, inverse = np.unique(epochs // 86400, return_inverse=True)
+        offsets = np.array([time.localtime(int(day) * 86400 + 43200).tm_gmtoff for day in days], dtype=np.int64)
+        return offsets[inverse].reshape(epochs.shape)
+    
+    def select(self, game_type=None):
+        """Boolean mask of sessions for one game, or all of them"""
+        np = self.np
+        if game_type is None:
+            return np.ones(len(self.game), dtype=bool)
+        codes = np.flatnonzero(self.game_names == game_type)
+        return self.game == codes[0] if len(codes) else np.zeros(len(self.game), dtype=bool)
+    
+    def occupancy_heatmap(self, game_type=None):
+        """Average tables occupied per hour of the week, as 7 rows (Mon..Sun) of 24 hours.
         
-        # Pool tables (new rates as requested)
-        self.pool_tables = {
-            1: {"status": "idle", "time": "00:00", "rate": 2.0, "amount": 0.0, "start_time": None, "elapsed_seconds": 0, "sessions": []},
-            2: {"status": "idle", "time": "00:00", "rate": 2.0, "amount": 0.0, "start_time": None, "elapsed_seconds": 0, "sessions": []},
-            3: {"status": "idle", "time": "00:00", "rate": 2.5, "amount": 0.0, "start_time": None, "elapsed_seconds": 0, "sessions": []}
+        Each session is split at local hour boundaries and its occupied seconds
+        are summed into the 168 hour-of-week slots with one bincount.
+        """
+        np = self.np
+        mask = self.select(game_type)
+        if not mask.any():
+            return {"weeks": 0, "days": self.WEEKDAYS, "occupancy": [[0.0] * 24 for _ in range(7)]}
+        
+        start = self.started_at[mask] + self.utc_offset[mask]
+        end = np.maximum(self.ended_at[mask] + self.utc_offset[mask], start)
+        first_hour = start // 3600
+        spans = end // 3600 - first_hour + 1
+        
+        # One entry per (session, local hour it touched)
+        hour = np.repeat(first_hour, spans) + (np.arange(spans.sum()) - np.repeat(np.cumsum(spans) - spans, spans))
+        overlap = (np.minimum(np.repeat(end, spans), (hour + 1) * 3600)
+                   - np.maximum(np.repeat(start, spans), hour * 3600))
+        # 1970-01-01 was a Thursday
+        slot = ((hour // 24 + 3) % 7) * 24 + hour % 24
+        occupied = np.bincount(slot, weights=overlap, minlength=168)
+        
+        weeks = max(1.0, (end.max() - start.min()) / (7 * 86400))
+        return {
+            "weeks": round(weeks, 1),
+            "days": self.WEEKDAYS,
+            "occupancy": np.round(occupied / 3600 / weeks, 3).reshape(7, 24).tolist()
         }
+    
+    def duration_distribution(self, game_type=None, bin_minutes=15, max_minutes=240):
+        """Histogram of billed session length plus mean and percentiles, in minutes"""
+        np = self.np
+        minutes = self.seconds[self.select(game_type)] / 60
+        edges = np.arange(0, max_minutes + bin_minutes, bin_minutes)
+        counts = np.bincount(np.minimum(minutes // bin_minutes, len(edges) - 1).astype(np.int64),
+                             minlength=len(edges))
+        if not len(minutes):
+            return {"sessions": 0, "bin_minutes": bin_minutes, "bins": edges.tolist(), "counts": counts.tolist()}
+        p50, p90, p99 = np.percentile(minutes, [50, 90, 99])
+        return {
+            "sessions": int(len(minutes)),
+            "mean": round(float(minutes.mean()), 1),
+            "p50": round(float(p50), 1),
+            "p90": round(float(p90), 1),
+            "p99": round(float(p99), 1),
+            "bin_minutes": bin_minutes,
+            # The last bin also counts everything longer than max_minutes
+            "bins": edges.tolist(),
+            "counts": counts.tolist()
+        }
+    
+    def revenue_by_table(self, game_type=None):
+        """Revenue per table per local calendar month"""
+        np = self.np
+        mask = self.select(game_type)
+        if not mask.any():
+            return {"months": [], "tables": {}}
+        
+        months = (self.ended_at[mask] + self.utc_offset[mask]).astype('datetime64[s]').astype('datetime64[M]')
+        month_values, month_index = np.unique(months, return_inverse=True)
+        # One integer key per (game, table) pair
+        table_keys = self.game[mask].astype(np.int64) * 100000 + self.table[mask]
+        key_values, key_index = np.unique(table_keys, return_inverse=True)
+        
+        cells = key_index.reshape(-1) * len(month_values) + month_index.reshape(-1)
+        paise = np.bincount(cells, weights=self.paise[mask], minlength=len(key_values) * len(month_values))
+        paise = paise.reshape(len(key_values), len(month_values))
+        
+        tables = {}
+        for key, row in zip(key_values.tolist(), (paise / 100).round(2).tolist()):
+            game = str(self.game_names[key // 100000])
+            tables.setdefault(game, {})[str(key % 100000)] = row
+        return {"months": [str(month) for month in month_values], "tables": tables}
+
+
+DEFAULT_GAMES = [
+    {
+        "key": "snooker",
+        "name": "Snooker",
+        "icon": "🎱",
+        "rates": [3.0, 4.0, 4.5],
+        "gradient": "#667eea 0%, #764ba2 100%",
+        "description": "Full-featured table tracking with timer, billing, and session management. "
+                       "Perfect for snooker halls and gaming centers."
+    },
+    {
+        # Pool tables (lower rates), on a light background that needs darker panels
+        "key": "pool",
+        "name": "Pool",
+        "icon": "🎳",
+        "rates": [2.0, 2.0, 2.5],
+        "gradient": "#11998e 0%, #38ef7d 100%",
+        "high_contrast": True,
+        "description": "Pool table management system with specialized lower rates. "
+                       "Perfect for pool halls and casual gaming."
+    }
+]
+
+DEFAULT_RATES = [2.0, 3.0, 3.5, 4.0, 4.5, 5.0, 5.5, 6.0, 6.5]
+
+# Default accounts created on first run (admin/admin123, staff1/staff123). The
+# hashes are precomputed so a fresh install doesn't spend boot time in scrypt.
+SEED_USERS = [
+    ('admin', 'scrypt:32768:8:1$OKI08WL3D8SNab5q$21bc22ac7fa38183cbc7aa46890b7ec19f57b1e4866ef57d1b5bc7e3a13ef71e'
+              'c637956c6d0045c7eccd694f07d547e7ceaa4f7f11461fd68e217398c6f64419', 'admin'),
+    ('staff1', 'scrypt:32768:8:1$HQErSaCF0TkaccoH$fdf4baf6612a96c5976643a930eaa1eefd0dbb4a18113f70f3a054eeeced3c40'
+               '4398720f7351563032965eacd33c9210e93c2262a6e4c692fb8b2aaf13e6e2d5', 'staff'),
+]
+
+
+class TableRegistry:
+    """Games (snooker, pool, PS5 bays, ...) and their tables, with O(1) lookup.
+    
+    Built from a JSON config of the form
+    
+        {"available_rates": [2.0, 3.0],
+         "games": [{"key": "ps5", "name": "PS5", "icon": "🎮", "unit": "Bay",
+                    "tables": 12, "rate": 2.0, "rates": [3.0, 3.0]}]}
+    
+    Table N takes rates[N-1] when given, else rate; "tables" defaults to the
+    length of rates. Without a config the original three snooker and three
+    pool tables are used.
+    """
+    
+    KEY_PATTERN = re.compile(r'^[a-z][a-z0-9_-]{0,31}$')
+    RESERVED_KEYS = {'api', 'assets', 'login', 'logout'}
+    
+    def __init__(self, games, available_rates=None):
+        self.available_rates = [float(rate) for rate in (available_rates or DEFAULT_RATES)]
+        self.games = {}
+        self.tables = {}
+        self.locks = {}
+        
+        for config in games:
+            key = config.get('key')
+            if not isinstance(key, str) or not self.KEY_PATTERN.match(key) or key in self.RESERVED_KEYS:
+                raise ValueError(f"invalid game key: {key!r}")
+            if key in self.games:
+                raise ValueError(f"duplicate game key: {key!r}")
+            
+            rates = [float(rate) for rate in config.get('rates', [])]
+            count = int(config.get('tables', len(rates)))
+            if count < 1:
+                raise ValueError(f"game {key!r} needs at least one table")
+            if count > len(rates) and 'rate' not in config:
+                raise ValueError(f"game {key!r} has {count} tables but only {len(rates)} rates and no default rate")
+            
+            self.games[key] = {
+                "key": key,
+                "name": config.get('name', key.title()),
+                "icon": config.get('icon', "🎯"),
+                "unit": config.get('unit', "Table"),
+                "gradient": config.get('gradient', "#667eea 0%, #764ba2 100%"),
+                "high_contrast": bool(config.get('high_contrast', False)),
+                "description": config.get('description', "Table tracking with timer, billing, and session management."),
+                "table_count": count
+            }
+            self.tables[key] = {}
+            for table_id in range(1, count + 1):
+                rate = rates[table_id - 1] if table_id <= len(rates) else float(config['rate'])
+                self.tables[key][table_id] = TableState(rate)
+                self.locks[(key, table_id)] = threading.Lock()
+        
+        if not self.games:
+            raise ValueError("no games configured")
+    
+    @classmethod
+    def load(cls, path=None):
+        if path is None:
+            return cls(DEFAULT_GAMES)
+        with open(path, encoding='utf-8') as f:
+            config = json.load(f)
+        return cls(config.get('games', []), config.get('available_rates'))
+    
+    def label(self, game_type, table_id):
+        game = self.games[game_type]
+        return f"{game['name']} {game['unit']} {table_id}"
+    
+    def url_converter(self):
+        """URL converter matching only configured game keys, so unknown games 404"""
+        pattern = '|'.join(re.escape(key) for key in self.games)
+        return type('GameConverter', (BaseConverter,), {'regex': f'(?:{pattern})'})
+
+
+class SimpleTableTracker:
+    def __init__(self, data_dir=None, tables_config=None, rollover_hour=6, shared_state=False, audit_fsync='batch'):
+        self.boot_started = time.perf_counter()
+        self.data_dir = data_dir or os.path.dirname(os.path.abspath(__file__))
+        
+        # Games and their tables, from tables.json when present
+        if tables_config is None and os.path.exists(os.path.join(self.data_dir, 'tables.json')):
+            tables_config = os.path.join(self.data_dir, 'tables.json')
+        self.registry = TableRegistry.load(tables_config)
+        self.tables = self.registry.tables
         
         # Available pricing options
-        self.available_rates = [2.0, 3.0, 3.5, 4.0, 4.5, 5.0, 5.5, 6.0, 6.5]
+        self.available_rates = self.registry.available_rates
         
-        # User storage (in-memory for simplicity)
-        self.users = {
-            'admin': User('admin', 'admin', generate_password_hash('admin123'), 'admin'),
-            'staff1': User('staff1', 'staff1', generate_password_hash('staff123'), 'staff')
-        }
+        # Where table state is locked and made durable: this process alone, or
+        # shared with other worker processes through the database
+        self.table_locks = self.registry.locks
+        if shared_state:
+            self.state = SQLiteStateBackend(self, os.path.join(self.data_dir, 'table_tracker.db'))
+        else:
+            self.state = LocalStateBackend(self, os.path.join(self.data_dir, 'table_state.journal'))
+        
+        # State revisions: every table change takes the next revision so clients can
+        # poll with ETags or ask for changes since a revision. Seeded from the wall
+        # clock so revisions keep increasing across restarts.
+        self.revision = self.state.initial_revision(int(time.time() * 1000))
+        self.game_revisions = {game_type: self.revision for game_type in self.registry.games}
+        self.revision_lock = threading.Lock()
+        for tables in self.tables.values():
+            for table in tables.values():
+                # Shared tables never committed are the same in every worker, so
+                # they all agree on rev 0 for them
+                table.rev = 0 if shared_state else self.revision
+        
+        # Serialized snapshots: each table's JSON is encoded once per table
+        # revision and each game's poll body once per game revision, so the
+        # cost of polling scales with the change rate, not the client count
+        self.table_json = {}
+        self.snapshots = {}
+        self.snapshot_lock = threading.Lock()
+        
+        # Push channel for /api/<game_type>/stream
+        self.events = EventBroker()
+        # Live streams allowed at once; None (the threaded dev server) means no limit
+        self.stream_slots = None
+        
+        # Timer status metric, logged at most once a minute while tables are in use
+        self.heartbeat = RateLimitedHeartbeat(60, self.log_heartbeat)
+        
+        # Durable ledger for sessions, rates and users
+        self.ledger = SessionLedger(os.path.join(self.data_dir, 'table_tracker.db'))
+        
+        # Closed business days move to the archive; only today's sessions stay in memory
+        self.archive = SessionArchive(os.path.join(self.data_dir, 'archive'), rollover_hour)
+        self.archived_until = None
+        self.stats = RevenueStats(self.archive.day_start)
+        # (archived days, from, to) -> SessionAnalytics; archived days never change
+        self.analytics = {}
+        self.analytics_lock = threading.Lock()
+        
+        # Who did what, kept apart from the ledger so disputes can be traced
+        self.audit = AuditLog(os.path.join(self.data_dir, 'audit'), audit_fsync)
+        
+        self.users = UserStore(self.ledger)
+        self.login_guard = LoginGuard()
+        self.load_ledger()
+        
+        self.restore_hot_state()
+        self.state.start()
+        
+        rollover = threading.Thread(target=self.run_rollover, name="day-rollover")
+        rollover.daemon = True
+        rollover.start()
         
-        self.running = True
         self.app = Flask(__name__)
         self.app.config['SECRET_KEY'] = 'your-secret-key-change-this-in-production'
+        self.app.url_map.converters['game'] = self.registry.url_converter()
         CORS(self.app)
         
         # Initialize Flask-Login
@@ -63,7 +1713,221 @@ class SimpleTableTracker:
             return self.users.get(user_id)
         
         self.setup_routes()
+        self.build_page_cache()
+        
+    def load_ledger(self):
+        """Restore rates, today's uncleared sessions and users from the ledger"""
+        for game_type, table_id, rate in self.ledger.load_rates():
+            tables = self.tables.get(game_type, {})
+            if table_id in tables:
+                tables[table_id].rate = rate
+        
+        sessions = {}
+        for game_type, table_id, started_at, ended_at, duration, amount, user in self.ledger.load_open_sessions(self.archive.day_start(time.time())):
+            if table_id in self.tables.get(game_type, {}):
+                sessions.setdefault((game_type, table_id), []).append(
+                    SessionRecord.from_ledger(started_at, ended_at, duration, amount, user))
+        for (game_type, table_id), records in sessions.items():
+            self.tables[game_type][table_id].sessions = tuple(records)
+        
+        # Today's takings include sessions that were cleared from the table view
+        for row in self.ledger.load_sessions_between(self.stats.opened_at, self.stats.closes_at):
+            self.stats.record(row[0], row[1], SessionRecord.from_ledger(*row[2:7]))
+        
+        self.users.load()
+        if not self.users:
+            # First run: seed the default accounts
+            for username, password_hash, role in SEED_USERS:
+                self.users.add(User(username, username, password_hash, role))
+    
+    def restore_hot_state(self):
+        """Resume tables that were running or paused when the process stopped"""
+        now = time.monotonic()
+        wall_now = time.time()
+        
+        for (game_type, table_id), record in self.state.restore().items():
+            tables = self.tables.get(game_type, {})
+            if table_id not in tables:
+                continue
+            
+            tables[table_id] = self.table_from_record(record, tables[table_id], now, wall_now)
+            tables[table_id].rev = record.get('rev', self.revision)
+            if record['status'] != 'idle':
+                logger.info("table_restored game=%s table=%s status=%s", game_type, table_id, record['status'])
+        
+        self.state.restored()
+    
+    def table_from_record(self, record, table, now, wall_now):
+        """TableState for a journal or shared-state record; rate and sessions
+        are taken from `table` when the record has none"""
+        restored = TableState(record.get('rate', table.rate), sessions=table.sessions)
+        if 'sessions' in record:
+            restored.sessions = tuple(SessionRecord(*session) for session in record['sessions'])
+        if record['status'] != 'idle':
+            restored.status = record['status']
+            restored.accumulated_seconds = record['accumulated_seconds']
+            restored.session_started_at = record['session_started_at']
+            if record['status'] == 'running':
+                # Time spent down (or crashed) is still billable for a running table
+                restored.run_started = now - max(0.0, wall_now - record['run_started_at'])
+        return restored
+    
+    def reload_users(self):
+        """Pick up users added or removed by another worker"""
+        self.users.load()
+        self.events.publish(None, 'users', {"action": "reloaded"})
+    
+    def run_rollover(self):
+        """Archive closed days at boot, then again at every rollover hour"""
+        while True:
+            try:
+                self.roll_over_day()
+            except Exception:
+                logger.exception("rollover_failed")
+            time.sleep(max(1.0, self.archive.day_start(time.time(), days=1) - time.time()))
+    
+    def roll_over_day(self):
+        """Write every closed, unarchived business day to the archive and drop
+        those sessions from the in-memory tables. The ledger keeps every row."""
+        today = self.archive.day_start(time.time())
+        start = self.archived_until
+        if start is None:
+            first = self.ledger.first_ended_at(today)
+            start = self.archive.day_start(first) if first is not None else today
+        
+        while start < today:
+            date = self.archive.business_date(start)
+            if not self.archive.has_day(date):
+                archived = self.archive.archive_day(self.ledger, start)
+                if archived:
+                    logger.info("day_archived date=%s sessions=%d", date, archived)
+            start = self.archive.day_start(start, days=1)
+        self.archived_until = today
+        
+        for game_type, tables in self.tables.items():
+            for table_id in list(tables):
+                with self.get_table_lock(game_type, table_id):
+                    sessions = tables[table_id].sessions
+                    if sessions and sessions[0].ended_at < today:
+                        table = tables[table_id].copy()
+                        table.sessions = tuple(session for session in sessions if session.ended_at >= today)
+                        self.commit_table(game_type, table_id, table)
+    
+    def get_analytics(self, date_from=None, date_to=None):
+        """Column store of archived sessions, loaded once per set of archived days"""
+        # Days the legacy importer rewrote change the version but not the list of days
+        key = ((tuple(self.archive.days()), self.archive.version()), date_from, date_to)
+        with self.analytics_lock:
+            analytics = self.analytics.get(key)
+            if analytics is None:
+                analytics = SessionAnalytics.from_archive(self.archive, date_from, date_to)
+                # Only the latest archive state is worth keeping
+                self.analytics = {k: v for k, v in self.analytics.items() if k[0] == key[0]}
+                self.analytics[key] = analytics
+        return analytics
+    
+    def export_chunks(self, date_from, date_to, export_format):
+        """Encoded export, one chunk per ledger batch"""
+        columns = SessionLedger.EXPORT_COLUMNS
+        if export_format == 'csv':
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(columns)
+            for rows in self.ledger.iter_sessions(date_from, date_to):
+                writer.writerows(rows)
+                yield buffer.getvalue().encode()
+                buffer.seek(0)
+                buffer.truncate()
+            if buffer.tell():
+                yield buffer.getvalue().encode()
+        else:
+            for rows in self.ledger.iter_sessions(date_from, date_to):
+                yield ''.join(json.dumps(dict(zip(columns, row)), separators=JSON_SEPARATORS) + '\n'
+                              for row in rows).encode()
+    
+    def get_journal_record(self, game_type, table_id, table, now=None, wall_now=None):
+        now = now if now is not None else time.monotonic()
+        wall_now = wall_now if wall_now is not None else time.time()
+        return {
+            "game_type": game_type,
+            "table_id": table_id,
+            "status": table.status,
+            "accumulated_seconds": table.accumulated_seconds,
+            "run_started_at": table.wall_started_at(now, wall_now),
+            "session_started_at": table.session_started_at
+        }
+    
+    def get_state_record(self, game_type, table_id, table):
+        """Journal record plus rate and sessions: everything another worker needs"""
+        record = self.get_journal_record(game_type, table_id, table)
+        record['rate'] = table.rate
+        record['sessions'] = [[session.started_at, session.ended_at, session.seconds, session.amount_paise, session.user]
+                              for session in table.sessions]
+        return record
+    
+    def get_journal_records(self):
+        """Snapshot of every non-idle table, used to compact the journal"""
+        now = time.monotonic()
+        wall_now = time.time()
+        records = []
+        for game_type, tables in self.tables.items():
+            for table_id, table in tables.items():
+                if table.status != 'idle':
+                    records.append(self.get_journal_record(game_type, table_id, table, now, wall_now))
+        return records
+    
+    def build_page_cache(self):
+        """Compile every page once at startup, with its CSS/JS split out as hashed assets"""
+        self.assets = {}
+        self.page_templates = {}
+        
+        pages = {('login',): self.get_login_html(), ('home',): self.get_home_html()}
+        for game_type in self.registry.games:
+            pages[('mobile', game_type)] = self.get_mobile_html(game_type)
+            for role in ('admin', 'staff'):
+                pages[('desktop', game_type, role)] = self.get_desktop_html(game_type, role)
         
+        for key, html in pages.items():
+            html = self.externalize_assets(key[0], html)
+            self.page_templates[key] = self.app.jinja_env.from_string(html)
+    
+    def externalize_assets(self, kind, html):
+        """Move static <style>/<script> blocks into long-cached, content-addressed assets.
+        
+        Assets are named <kind>.<hash>.<ext> after the page kind (desktop, mobile, ...),
+        not the game, so every page carrying the same block shares one asset and one
+        browser cache entry. Blocks containing template tags stay inline since they
+        vary per user, as do tiny blocks that would cost more as a request than they save.
+        """
+        def register(ext, content, mimetype):
+            digest = hashlib.sha256(content.encode('utf-8')).hexdigest()[:12]
+            filename = f"{kind}.{digest}.{ext}"
+            self.assets[filename] = (content.encode('utf-8'), mimetype)
+            return f"/assets/{filename}"
+        
+        def replace_style(match):
+            return f'<link rel="stylesheet" href="{register("css", match.group(1), "text/css")}">'
+        
+        def replace_script(match):
+            if '{{' in match.group(1) or '{%' in match.group(1) or len(match.group(1)) < 200:
+                return match.group(0)
+            return f'<script src="{register("js", match.group(1), "application/javascript")}"></script>'
+        
+        html = re.sub(r'<style>(.*?)</style>', replace_style, html, flags=re.S)
+        return re.sub(r'<script>(.*?)</script>', replace_script, html, flags=re.S)
+    
+    def render_page(self, page, game_type=None):
+        if page == 'desktop':
+            key = ('desktop', game_type, current_user.role)
+        elif page == 'mobile':
+            key = ('mobile', game_type)
+        else:
+            key = (page,)
+        
+        if current_user.is_authenticated:
+            return render_template(self.page_templates[key], username=current_user.username, role=current_user.role)
+        return render_template(self.page_templates[key])
+    
     def admin_required(self, f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
@@ -77,49 +1941,56 @@ class SimpleTableTracker:
         @self.app.route('/')
         @login_required
         def home_page():
-            return render_template_string(self.get_home_html())
+            return self.render_page('home')
         
         @self.app.route('/login', methods=['GET', 'POST'])
         def login():
             if request.method == 'POST':
                 username = request.form['username']
                 password = request.form['password']
+                client = request.remote_addr or '-'
+                
+                retry_after = self.login_guard.take(username, client)
+                if retry_after:
+                    retry_after = int(retry_after) + 1
+                    logger.debug("login_throttled username=%s client=%s retry_after=%ss", username, client, retry_after)
+                    flash(f'Too many login attempts. Try again in {retry_after} seconds.')
+                    return self.render_page('login'), 429, {'Retry-After': str(retry_after)}
                 
                 user = self.users.get(username)
-                if user and check_password_hash(user.password_hash, password):
+                verified = self.login_guard.verify(user, password) if user else False
+                if verified is None:
+                    logger.warning("login_busy username=%s client=%s", username, client)
+                    flash('Server busy, please try again.')
+                    return self.render_page('login'), 503, {'Retry-After': '1'}
+                if verified:
                     login_user(user)
+                    self.audit.record(username, 'login', client=client)
                     next_page = request.args.get('next')
                     return redirect(next_page) if next_page else redirect(url_for('home_page'))
                 else:
+                    self.login_guard.failed(username)
+                    logger.info("login_failed username=%s client=%s", username, client)
                     flash('Invalid username or password')
             
-            return render_template_string(self.get_login_html())
+            return self.render_page('login')
         
         @self.app.route('/logout')
         @login_required
         def logout():
+            self.audit.record(current_user.username, 'logout')
             logout_user()
             return redirect(url_for('login'))
         
-        @self.app.route('/snooker')
-        @login_required
-        def snooker_interface():
-            return render_template_string(self.get_desktop_html("snooker"))
-            
-        @self.app.route('/snooker/mobile')
-        @login_required
-        def snooker_mobile_interface():
-            return render_template_string(self.get_mobile_html("snooker"))
-        
-        @self.app.route('/pool')
+        @self.app.route('/<game:game_type>')
         @login_required
-        def pool_interface():
-            return render_template_string(self.get_desktop_html("pool"))
+        def game_interface(game_type):
+            return self.render_page('desktop', game_type)
             
-        @self.app.route('/pool/mobile')
+        @self.app.route('/<game:game_type>/mobile')
         @login_required
-        def pool_mobile_interface():
-            return render_template_string(self.get_mobile_html("pool"))
+        def game_mobile_interface(game_type):
+            return self.render_page('mobile', game_type)
         
         @self.app.route('/api/users', methods=['GET'])
         @login_required
@@ -127,18 +1998,18 @@ class SimpleTableTracker:
             if current_user.role != 'admin':
                 return jsonify({"error": "Admin access required"}), 403
             
-            user_list = []
-            for user in self.users.values():
-                user_list.append({
-                    'username': user.username,
-                    'role': user.role,
-                    'can_remove': user.username != current_user.username  # Can't remove yourself
-                })
+            role = request.args.get('role')
+            if role not in (None, 'admin', 'staff'):
+                return jsonify({"error": "role must be admin or staff"}), 400
             
-            return jsonify({
-                "success": True,
-                "users": user_list
-            })
+            version, body = self.users.listing(current_user.username, role)
+            etag = f"users-{version}-{current_user.username}-{role or 'all'}"
+            if request.if_none_match.contains_weak(etag):
+                response = self.app.response_class(status=304)
+            else:
+                response = self.app.response_class(body, mimetype='application/json')
+            response.set_etag(etag, weak=True)
+            return response
         
         @self.app.route('/api/users/add', methods=['POST'])
         @login_required
@@ -155,14 +2026,16 @@ class SimpleTableTracker:
                 if not username or not password or role not in ['admin', 'staff']:
                     return jsonify({"error": "Invalid user data"}), 400
                 
-                if username in self.users:
-                    return jsonify({"error": "Username already exists"}), 400
-                
                 password_hash = generate_password_hash(password)
                 new_user = User(username, username, password_hash, role)
-                self.users[username] = new_user
                 
-                print(f"New {role} user created: {username} by {current_user.username}")
+                if not self.users.add(new_user):
+                    return jsonify({"error": "Username already exists"}), 400
+                self.state.users_changed()
+                
+                logger.info("user_added username=%s role=%s by=%s", username, role, current_user.username)
+                self.audit.record(current_user.username, 'user_added', username=username, role=role)
+                self.events.publish(None, 'users', {"action": "added", "username": username})
                 
                 return jsonify({
                     "success": True,
@@ -170,7 +2043,7 @@ class SimpleTableTracker:
                 })
                 
             except Exception as e:
-                print(f"Add User Error: {e}")
+                logger.exception("add_user_failed")
                 return jsonify({"error": str(e)}), 500
         
         # NEW ROUTE: Remove user functionality
@@ -187,17 +2060,17 @@ class SimpleTableTracker:
                 if not username:
                     return jsonify({"error": "Username is required"}), 400
                 
-                if username not in self.users:
-                    return jsonify({"error": "User not found"}), 404
-                
                 if username == current_user.username:
                     return jsonify({"error": "Cannot remove yourself"}), 400
                 
-                # Store user info before deletion for logging
-                removed_user = self.users[username]
-                del self.users[username]
+                removed_user = self.users.remove(username)
+                if removed_user is None:
+                    return jsonify({"error": "User not found"}), 404
+                self.state.users_changed()
                 
-                print(f"User removed: {username} ({removed_user.role}) by {current_user.username}")
+                logger.info("user_removed username=%s role=%s by=%s", username, removed_user.role, current_user.username)
+                self.audit.record(current_user.username, 'user_removed', username=username, role=removed_user.role)
+                self.events.publish(None, 'users', {"action": "removed", "username": username})
                 
                 return jsonify({
                     "success": True,
@@ -205,55 +2078,140 @@ class SimpleTableTracker:
                 })
                 
             except Exception as e:
-                print(f"Remove User Error: {e}")
+                logger.exception("remove_user_failed")
                 return jsonify({"error": str(e)}), 500
             
-        @self.app.route('/api/<game_type>/tables', methods=['GET'])
+        @self.app.route('/assets/<path:filename>')
+        def serve_asset(filename):
+            if filename not in self.assets:
+                return jsonify({"error": "Not found"}), 404
+            
+            content, mimetype = self.assets[filename]
+            response = self.app.response_class(content, mimetype=mimetype)
+            # File names carry a content hash, so they can be cached forever
+            response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+            return response
+        
+        @self.app.after_request
+        def add_server_time(response):
+            # Lets clients run timers locally against the server clock
+            response.headers['X-Server-Time'] = str(int(time.time() * 1000))
+            return response
+            
+        @self.app.route('/api/<game:game_type>/tables', methods=['GET'])
         @login_required
         def get_tables(game_type):
-            tables = self.snooker_tables if game_type == 'snooker' else self.pool_tables
-            return jsonify({
-                "success": True,
-                "tables": tables,
-                "available_rates": self.available_rates,
-                "timestamp": datetime.now().isoformat()
+            tables = self.tables[game_type]
+            self.heartbeat.maybe_emit()
+            # Read the revision before the tables: a table committed in between is
+            # simply sent again on the next poll
+            revision = self.game_revisions[game_type]
+            etag = f"{game_type}-{revision}"
+            
+            if request.if_none_match.contains_weak(etag):
+                response = self.app.response_class(status=304)
+                response.set_etag(etag, weak=True)
+                response.headers['Cache-Control'] = 'no-cache'
+                return response
+            
+            # ?since=<rev> returns only tables changed after that revision
+            since = request.args.get('since', type=int)
+            if since is not None and since <= revision:
+                changed = {table_id: table for table_id, table in list(tables.items()) if table.rev > since}
+                body = dumps_with({"success": True, "revision": revision, "delta": True,
+                                   "available_rates": self.available_rates},
+                                  "tables", self.get_tables_json(game_type, changed))
+            else:
+                body = self.get_snapshot(game_type, revision)[1]
+            
+            response = self.app.response_class(body, mimetype='application/json')
+            response.set_etag(etag, weak=True)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+            
+        @self.app.route('/api/tables', methods=['GET'])
+        @login_required
+        def get_all_tables():
+            revisions = tuple(self.game_revisions[game_type] for game_type in self.registry.games)
+            etag = 'all-' + '-'.join(map(str, revisions))
+            
+            if request.if_none_match.contains_weak(etag):
+                response = self.app.response_class(status=304)
+            else:
+                response = self.app.response_class(self.get_combined_snapshot(revisions), mimetype='application/json')
+            response.set_etag(etag, weak=True)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+            
+        @self.app.route('/api/<game:game_type>/stream', methods=['GET'])
+        @login_required
+        def stream_tables(game_type):
+            # At the limit every stream would pin another worker thread: refuse,
+            # and the page polls instead
+            slots = self.stream_slots
+            if slots is not None and not slots.acquire(blocking=False):
+                logger.info("stream_refused game=%s user=%s", game_type, current_user.username)
+                return jsonify({"error": "Too many live streams, poll instead"}), 503, {'Retry-After': '60'}
+            
+            subscriber = self.events.subscribe(game_type)
+            
+            def event_stream():
+                try:
+                    yield "retry: 3000\n\n"
+                    while True:
+                        try:
+                            yield subscriber.get(timeout=15)
+                        except queue.Empty:
+                            # Keep-alive comment so proxies and dead sockets are noticed
+                            self.heartbeat.maybe_emit()
+                            yield ": keep-alive\n\n"
+                finally:
+                    self.events.unsubscribe(game_type, subscriber)
+            
+            response = Response(event_stream(), mimetype='text/event-stream', headers={
+                'Cache-Control': 'no-cache',
+                'X-Accel-Buffering': 'no'
             })
+            if slots is not None:
+                # Runs when the server closes the response, even if it never started streaming
+                response.call_on_close(slots.release)
+            return response
             
-        @self.app.route('/api/<game_type>/table/<int:table_id>/action', methods=['POST'])
+        @self.app.route('/api/<game:game_type>/table/<int:table_id>/action', methods=['POST'])
         @login_required
         def table_action(game_type, table_id):
             try:
                 data = request.get_json()
                 action = data.get('action')
                 
-                tables = self.snooker_tables if game_type == 'snooker' else self.pool_tables
+                tables = self.tables[game_type]
                 
                 if table_id not in tables or action not in ['start', 'pause', 'end']:
                     return jsonify({"error": "Invalid request"}), 400
                 
                 result = self.handle_table_action(game_type, table_id, action)
-                print(f"Action: {game_type.title()} Table {table_id} - {action} - {result} - User: {current_user.username}")
+                logger.info("table_action game=%s table=%s action=%s user=%s result=%r",
+                            game_type, table_id, action, current_user.username, result)
                 
-                return jsonify({
+                return self.tables_response(game_type, {
                     "success": True,
                     "table": table_id,
                     "action": action,
-                    "result": result,
-                    "tables": tables
+                    "result": result
                 })
                 
             except Exception as e:
-                print(f"API Error: {e}")
+                logger.exception("table_action_failed game=%s table=%s", game_type, table_id)
                 return jsonify({"error": str(e)}), 500
         
-        @self.app.route('/api/<game_type>/table/<int:table_id>/rate', methods=['POST'])
+        @self.app.route('/api/<game:game_type>/table/<int:table_id>/rate', methods=['POST'])
         @login_required
         def update_table_rate(game_type, table_id):
             try:
                 data = request.get_json()
                 new_rate = float(data.get('rate'))
                 
-                tables = self.snooker_tables if game_type == 'snooker' else self.pool_tables
+                tables = self.tables[game_type]
                 
                 if table_id not in tables:
                     return jsonify({"error": "Invalid table ID"}), 400
@@ -261,70 +2219,225 @@ class SimpleTableTracker:
                 if new_rate not in self.available_rates:
                     return jsonify({"error": "Invalid rate"}), 400
                 
-                if tables[table_id]['status'] != 'idle':
-                    return jsonify({"error": "Cannot change rate while table is running"}), 400
-                
-                tables[table_id]['rate'] = new_rate
-                print(f"{game_type.title()} Table {table_id} rate updated to ₹{new_rate}/min by {current_user.username}")
+                with self.get_table_lock(game_type, table_id):
+                    table = tables[table_id].copy()
+                    if table.status != 'idle':
+                        return jsonify({"error": "Cannot change rate while table is running"}), 400
+                    
+                    old_rate, table.rate = table.rate, new_rate
+                    self.commit_table(game_type, table_id, table)
+                # Synchronous ledger commits wait for the database write lock, which
+                # the shared state backend holds until the table lock is released
+                self.ledger.save_rate(game_type, table_id, new_rate)
+                logger.info("rate_changed game=%s table=%s rate=%s user=%s", game_type, table_id, new_rate, current_user.username)
+                self.audit.record(current_user.username, 'rate', game_type, table_id, old_rate=old_rate, rate=new_rate)
                 
-                return jsonify({
+                return self.tables_response(game_type, {
                     "success": True,
                     "table": table_id,
-                    "new_rate": new_rate,
-                    "tables": tables
+                    "new_rate": new_rate
                 })
                 
             except Exception as e:
-                print(f"Rate Update Error: {e}")
+                logger.exception("rate_change_failed game=%s table=%s", game_type, table_id)
                 return jsonify({"error": str(e)}), 500
         
-        @self.app.route('/api/<game_type>/table/<int:table_id>/clear', methods=['POST'])
+        @self.app.route('/api/<game:game_type>/table/<int:table_id>/clear', methods=['POST'])
         @login_required
         def clear_table_data(game_type, table_id):
             try:
-                tables = self.snooker_tables if game_type == 'snooker' else self.pool_tables
+                tables = self.tables[game_type]
                 
                 if table_id not in tables:
                     return jsonify({"error": "Invalid table ID"}), 400
                 
-                tables[table_id]['sessions'] = []
-                print(f"{game_type.title()} Table {table_id} session data cleared by {current_user.username}")
+                with self.get_table_lock(game_type, table_id):
+                    table = tables[table_id].copy()
+                    cleared = table.sessions
+                    table.sessions = ()
+                    self.state.clear_sessions(game_type, table_id)
+                    self.commit_table(game_type, table_id, table)
+                logger.info("sessions_cleared game=%s table=%s user=%s", game_type, table_id, current_user.username)
+                self.audit.record(current_user.username, 'clear', game_type, table_id, sessions=len(cleared),
+                                  amount=sum(session.amount_paise for session in cleared) / 100)
                 
-                return jsonify({
+                return self.tables_response(game_type, {
                     "success": True,
                     "table": table_id,
-                    "message": f"Table {table_id} data cleared",
-                    "tables": tables
+                    "message": f"{self.registry.games[game_type]['unit']} {table_id} data cleared"
                 })
                 
             except Exception as e:
-                print(f"Clear Error: {e}")
+                logger.exception("clear_failed game=%s table=%s", game_type, table_id)
                 return jsonify({"error": str(e)}), 500
         
-        @self.app.route('/api/<game_type>/table/<int:table_id>/split', methods=['POST'])
+        @self.app.route('/api/<game:game_type>/table/<int:table_id>/sessions', methods=['GET'])
+        @login_required
+        def get_table_sessions(game_type, table_id):
+            if table_id not in self.tables[game_type]:
+                return jsonify({"error": "Invalid table ID"}), 400
+            
+            # ?limit=&before=<cursor>&after=<id>&from=YYYY-MM-DD&to=YYYY-MM-DD&all=1
+            limit = request.args.get('limit', 50, type=int)
+            before = request.args.get('before', type=int)
+            after = request.args.get('after', type=int)
+            date_from = request.args.get('from')
+            date_to = request.args.get('to')
+            if not 1 <= limit <= 200:
+                return jsonify({"error": "limit must be between 1 and 200"}), 400
+            for value in (date_from, date_to):
+                if value is not None and not DATE_PATTERN.fullmatch(value):
+                    return jsonify({"error": "Dates must be YYYY-MM-DD"}), 400
+            
+            rows = self.ledger.load_sessions(game_type, table_id, before, date_from, date_to,
+                                             include_cleared=request.args.get('all') == '1', limit=limit + 1, after=after)
+            next_cursor = rows[limit - 1][0] if len(rows) > limit else None
+            # Each session carries its ledger id so clients can ask for what is newer
+            sessions = [{"id": row[0], **SessionRecord.from_ledger(*row[1:]).as_dict()} for row in rows[:limit]]
+            return self.app.response_class(dumps_with({
+                "success": True,
+                "table": table_id,
+                "next_cursor": next_cursor
+            }, "sessions", json.dumps(sessions, separators=JSON_SEPARATORS)), mimetype='application/json')
+        
+        @self.app.route('/api/stats', methods=['GET'])
+        @login_required
+        def get_stats():
+            if current_user.role != 'admin':
+                return jsonify({"error": "Admin access required"}), 403
+            
+            table_counts = {game_type: game['table_count'] for game_type, game in self.registry.games.items()}
+            return jsonify({"success": True, **self.stats.as_dict(table_counts)})
+        
+        @self.app.route('/api/analytics/<report>', methods=['GET'])
+        @login_required
+        def get_analytics(report):
+            # ?game=<game_type>&from=YYYY-MM-DD&to=YYYY-MM-DD over archived days
+            if current_user.role != 'admin':
+                return jsonify({"error": "Admin access required"}), 403
+            reports = {
+                "heatmap": SessionAnalytics.occupancy_heatmap,
+                "durations": SessionAnalytics.duration_distribution,
+                "revenue": SessionAnalytics.revenue_by_table
+            }
+            if report not in reports:
+                return jsonify({"error": f"Unknown report, use one of {', '.join(reports)}"}), 404
+            
+            date_from = request.args.get('from')
+            date_to = request.args.get('to')
+            for value in (date_from, date_to):
+                if value is not None and not DATE_PATTERN.fullmatch(value):
+                    return jsonify({"error": "Dates must be YYYY-MM-DD"}), 400
+            
+            try:
+                analytics = self.get_analytics(date_from, date_to)
+            except RuntimeError as e:
+                return jsonify({"error": str(e)}), 503
+            return jsonify({"success": True, "report": report,
+                            **reports[report](analytics, request.args.get('game'))})
+        
+        @self.app.route('/api/export', methods=['GET'])
+        @login_required
+        def export_sessions():
+            # ?from=YYYY-MM-DD&to=YYYY-MM-DD&format=csv|jsonl&gzip=1
+            if current_user.role != 'admin':
+                return jsonify({"error": "Admin access required"}), 403
+            
+            date_from = request.args.get('from', '0000-00-00')
+            date_to = request.args.get('to', '9999-12-31')
+            export_format = request.args.get('format', 'csv')
+            compress = request.args.get('gzip') == '1'
+            if not DATE_PATTERN.fullmatch(date_from) or not DATE_PATTERN.fullmatch(date_to):
+                return jsonify({"error": "Dates must be YYYY-MM-DD"}), 400
+            if export_format not in ('csv', 'jsonl'):
+                return jsonify({"error": "format must be csv or jsonl"}), 400
+            
+            chunks = self.export_chunks(date_from, date_to, export_format)
+            filename = f"sessions_{request.args.get('from', 'all')}_{request.args.get('to', 'all')}.{export_format}"
+            mimetype = 'text/csv' if export_format == 'csv' else 'application/x-ndjson'
+            if compress:
+                chunks = gzip_chunks(chunks)
+                filename += '.gz'
+                mimetype = 'application/gzip'
+            logger.info("sessions_exported from=%s to=%s format=%s gzip=%s user=%s",
+                        date_from, date_to, export_format, compress, current_user.username)
+            return Response(chunks, mimetype=mimetype, headers={
+                'Content-Disposition': f'attachment; filename="{filename}"',
+                'Cache-Control': 'no-store'
+            })
+        
+        @self.app.route('/api/audit', methods=['GET'])
+        @login_required
+        def get_audit_log():
+            # ?from=&to= as YYYY-MM-DD, YYYY-MM-DDTHH:MM[:SS] (local) or epoch seconds,
+            # default today; &user=&game=&table=&action= filter; &limit= caps the entries
+            if current_user.role != 'admin':
+                return jsonify({"error": "Admin access required"}), 403
+            
+            now = time.time()
+            start = parse_local_time(request.args.get('from', ''))
+            end = parse_local_time(request.args.get('to', ''), end_of_day=True)
+            if start is None:
+                start = time.mktime(time.localtime(now)[:3] + (0, 0, 0, 0, 0, -1))
+            if end is None:
+                end = now + 1
+            limit = min(max(request.args.get('limit', 500, type=int), 1), 5000)
+            
+            entries, truncated = self.audit.query(
+                start, end, user=request.args.get('user'), game_type=request.args.get('game'),
+                table_id=request.args.get('table', type=int), action=request.args.get('action'), limit=limit)
+            return jsonify({"success": True, "from": start, "to": end, "entries": entries, "truncated": truncated})
+        
+        @self.app.route('/api/archive', methods=['GET'])
+        @login_required
+        def get_archived_days():
+            return jsonify({"success": True, "days": self.archive.days()})
+        
+        @self.app.route('/api/archive/<date>', methods=['GET'])
+        @login_required
+        def get_archived_day(date):
+            # ?game=<game_type>&table=<id> narrow the day down
+            if not DATE_PATTERN.fullmatch(date):
+                return jsonify({"error": "Dates must be YYYY-MM-DD"}), 400
+            lines = self.archive.read_day(date)
+            if lines is None:
+                return jsonify({"error": f"No archive for {date}"}), 404
+            
+            game_type = request.args.get('game')
+            table_id = request.args.get('table', type=int)
+            if game_type is not None or table_id is not None:
+                def matches(line):
+                    entry = json.loads(line)
+                    return game_type in (None, entry['game_type']) and table_id in (None, entry['table_id'])
+                lines = [line for line in lines if matches(line)]
+            return self.app.response_class(dumps_with({"success": True, "date": date}, "sessions",
+                                                      '[' + ','.join(lines) + ']'), mimetype='application/json')
+        
+        @self.app.route('/api/<game:game_type>/table/<int:table_id>/split', methods=['POST'])
         @login_required
         def split_amount(game_type, table_id):
             try:
                 data = request.get_json()
                 players = int(data.get('players', 0))
                 
-                tables = self.snooker_tables if game_type == 'snooker' else self.pool_tables
+                tables = self.tables[game_type]
                 
                 if table_id not in tables:
                     return jsonify({"error": "Invalid table ID"}), 400
                 
                 table = tables[table_id]
                 
-                if not table['sessions'] or len(table['sessions']) == 0:
+                if not table.sessions:
                     return jsonify({"error": "No sessions to split"}), 400
                 
-                last_session = table['sessions'][-1]
-                total_amount = last_session['amount']
+                total_amount = table.sessions[-1].amount
                 
                 if players < 1 or players > 50:
                     return jsonify({"error": "Invalid number of players (1-50)"}), 400
                 
                 per_player = total_amount / players
+                self.audit.record(current_user.username, 'split', game_type, table_id, players=players,
+                                  total_amount=total_amount, per_player=round(per_player, 2))
                 
                 return jsonify({
                     "success": True,
@@ -335,113 +2448,222 @@ class SimpleTableTracker:
                 })
                 
             except Exception as e:
-                print(f"Split Error: {e}")
+                logger.exception("split_failed game=%s table=%s", game_type, table_id)
                 return jsonify({"error": str(e)}), 500
     
     def handle_table_action(self, game_type, table_id, action):
-        tables = self.snooker_tables if game_type == 'snooker' else self.pool_tables
-        table = tables[table_id]
-        
-        if action == 'start':
-            if table['status'] == 'idle':
-                table['status'] = 'running'
-                table['start_time'] = datetime.now()
-                table['elapsed_seconds'] = 0
-                table['session_start_time'] = datetime.now().strftime("%H:%M:%S")
-                return f"{game_type.title()} Table {table_id} started"
-                
-        elif action == 'pause':
-            if table['status'] == 'running':
-                table['status'] = 'paused'
-                return f"{game_type.title()} Table {table_id} paused"
-            elif table['status'] == 'paused':
-                table['status'] = 'running'
-                table['start_time'] = datetime.now()
-                return f"{game_type.title()} Table {table_id} resumed"
-                
-        elif action == 'end':
-            if table['status'] in ['running', 'paused']:
-                duration_minutes = table['elapsed_seconds'] / 60
-                amount = duration_minutes * table['rate']
-                end_time = datetime.now().strftime("%H:%M:%S")
-                
-                session = {
-                    "start_time": table.get('session_start_time', '00:00:00'),
-                    "end_time": end_time,
-                    "duration": round(duration_minutes, 1),
-                    "amount": round(amount, 2),
-                    "date": datetime.now().strftime("%Y-%m-%d"),
-                    "user": current_user.username
-                }
-                table['sessions'].append(session)
-                
-                table['status'] = 'idle'
-                table['time'] = '00:00'
-                table['amount'] = 0
-                table['start_time'] = None
-                table['elapsed_seconds'] = 0
-                table['session_start_time'] = None
-                
-                return f"{game_type.title()} Table {table_id} ended - ₹{amount:.2f} for {duration_minutes:.1f} minutes"
+        tables = self.tables[game_type]
+        
+        with self.get_table_lock(game_type, table_id):
+            # Work on a private copy; readers keep seeing the installed version
+            table = tables[table_id].copy()
+            now = time.monotonic()
+            
+            if action == 'start':
+                if table.status == 'idle':
+                    table.status = 'running'
+                    table.accumulated_seconds = 0.0
+                    table.run_started = now
+                    table.session_started_at = time.time()
+                    self.commit_table(game_type, table_id, table)
+                    self.audit.record(current_user.username, 'start', game_type, table_id, rate=table.rate)
+                    return f"{self.registry.label(game_type, table_id)} started"
+                    
+            elif action == 'pause':
+                if table.status == 'running':
+                    table.status = 'paused'
+                    table.accumulated_seconds += now - table.run_started
+                    table.run_started = None
+                    self.commit_table(game_type, table_id, table)
+                    self.audit.record(current_user.username, 'pause', game_type, table_id,
+                                      seconds=round(table.accumulated_seconds))
+                    return f"{self.registry.label(game_type, table_id)} paused"
+                elif table.status == 'paused':
+                    table.status = 'running'
+                    table.run_started = now
+                    self.commit_table(game_type, table_id, table)
+                    self.audit.record(current_user.username, 'resume', game_type, table_id,
+                                      seconds=round(table.accumulated_seconds))
+                    return f"{self.registry.label(game_type, table_id)} resumed"
+                    
+            elif action == 'end':
+                if table.status in ['running', 'paused']:
+                    elapsed = table.elapsed(now)
+                    duration_minutes = elapsed / 60
+                    amount = duration_minutes * table.rate
+                    ended_at = time.time()
+                    
+                    session = SessionRecord(table.session_started_at or ended_at, ended_at,
+                                            round(elapsed), round(amount * 100), current_user.username)
+                    table.sessions = table.sessions + (session,)
+                    self.state.record_session(game_type, table_id, session)
+                    self.stats.record(game_type, table_id, session)
+                    
+                    table.status = 'idle'
+                    table.accumulated_seconds = 0.0
+                    table.run_started = None
+                    table.session_started_at = None
+                    self.commit_table(game_type, table_id, table)
+                    self.audit.record(current_user.username, 'end', game_type, table_id, seconds=session.seconds,
+                                      amount=session.amount_paise / 100, rate=table.rate)
+                    
+                    return f"{self.registry.label(game_type, table_id)} ended - ₹{amount:.2f} for {duration_minutes:.1f} minutes"
         
         return "No action taken"
     
-    def update_timers(self):
-        """Background timer updates for both snooker and pool"""
-        print("⏰ Timer thread started")
-        while self.running:
-            try:
-                updated = False
-                
-                # Update snooker tables
-                for table_id, table in self.snooker_tables.items():
-                    if table['status'] == 'running' and table['start_time']:
-                        table['elapsed_seconds'] += 1
-                        
-                        minutes = table['elapsed_seconds'] // 60
-                        seconds = table['elapsed_seconds'] % 60
-                        table['time'] = f"{minutes:02d}:{seconds:02d}"
-                        
-                        duration_minutes = table['elapsed_seconds'] / 60
-                        table['amount'] = duration_minutes * table['rate']
-                        
-                        table['start_time'] = datetime.now()
-                        updated = True
-                
-                # Update pool tables
-                for table_id, table in self.pool_tables.items():
-                    if table['status'] == 'running' and table['start_time']:
-                        table['elapsed_seconds'] += 1
-                        
-                        minutes = table['elapsed_seconds'] // 60
-                        seconds = table['elapsed_seconds'] % 60
-                        table['time'] = f"{minutes:02d}:{seconds:02d}"
-                        
-                        duration_minutes = table['elapsed_seconds'] / 60
-                        table['amount'] = duration_minutes * table['rate']
-                        
-                        table['start_time'] = datetime.now()
-                        updated = True
-                
-                if updated:
-                    print(f"⏱️ Timers updated: {datetime.now().strftime('%H:%M:%S')}")
-                
-                time.sleep(1)
-                
-            except Exception as e:
-                print(f"Timer error: {e}")
-                time.sleep(1)
+    def get_table_lock(self, game_type, table_id):
+        return self.state.lock(game_type, table_id)
     
-    def get_local_ip(self):
+    def commit_table(self, game_type, table_id, table):
+        """Install a new version of a table under the next state revision.
+        
+        Callers hold the table's lock and pass a fresh copy; installed tables are
+        never mutated, so readers always see a consistent table without locking.
+        """
+        tables = self.tables[game_type]
+        
+        with self.revision_lock:
+            self.revision = self.state.next_revision(self.revision)
+            revision = self.revision
+            table.rev = revision
+            tables[table_id] = table
+            self.game_revisions[game_type] = revision
+        
+        self.state.save(game_type, table_id, table)
+        self.publish_table(game_type, table_id, table)
+    
+    def install_table(self, game_type, table_id, record, rev):
+        """Install a version of a table that another worker committed.
+        
+        Callers hold the table's in-process lock.
+        """
+        tables = self.tables[game_type]
+        previous = tables[table_id]
+        table = self.table_from_record(record, previous, time.monotonic(), time.time())
+        table.rev = rev
+        
+        with self.revision_lock:
+            tables[table_id] = table
+            self.revision = max(self.revision, rev)
+            self.game_revisions[game_type] = max(self.game_revisions[game_type], rev)
+        
+        # Sessions the other worker ended count towards this worker's totals too. Tell them
+        # apart by end time, not list length: a clear and an end can land between installs.
+        last_end = previous.sessions[-1].ended_at if previous.sessions else 0
+        counted = {(session.started_at, session.ended_at) for session in
+                   itertools.takewhile(lambda session: session.ended_at == last_end, reversed(previous.sessions))}
+        ended = [session for session in
+                 itertools.takewhile(lambda session: session.ended_at >= last_end, reversed(table.sessions))
+                 if (session.started_at, session.ended_at) not in counted]
+        for session in reversed(ended):
+            self.stats.record(game_type, table_id, session)
+        self.publish_table(game_type, table_id, table)
+    
+    def publish_table(self, game_type, table_id, table):
+        # Encode the new version once; the event and every later snapshot reuse it
+        self.events.publish(game_type, 'tables', dumps_with({
+            "revision": table.rev,
+            "server_time": int(time.time() * 1000)
+        }, "tables", self.get_tables_json(game_type, {table_id: table})))
+    
+    def log_heartbeat(self):
+        tables = [table for tables in self.tables.values() for table in tables.values()]
+        running = sum(1 for table in tables if table.status == 'running')
+        paused = sum(1 for table in tables if table.status == 'paused')
+        if running or paused:
+            logger.info("timers running=%d paused=%d revision=%d", running, paused, self.revision)
+    
+    def get_tables_json(self, game_type, tables):
+        """JSON object of table views, reusing each table's encoding while its rev is unchanged"""
+        now = time.monotonic()
+        wall_now = time.time()
+        parts = []
+        for table_id, table in list(tables.items()):
+            cached = self.table_json.get((game_type, table_id))
+            if cached is None or cached[0] != table.rev:
+                cached = (table.rev, table.to_json(now, wall_now))
+                self.table_json[(game_type, table_id)] = cached
+            parts.append(f'"{table_id}":{cached[1]}')
+        return '{' + ','.join(parts) + '}'
+    
+    def get_snapshot(self, game_type, revision):
+        """(tables JSON, full poll body) for a game, built once per game revision.
+        
+        The caller reads the revision before the tables, so a snapshot may also hold
+        a table committed just after it; that table is simply sent again with the
+        next revision.
+        """
+        cached = self.snapshots.get(game_type)
+        if cached is None or cached[0] != revision:
+            with self.snapshot_lock:
+                cached = self.snapshots.get(game_type)
+                if cached is None or cached[0] != revision:
+                    tables = self.tables[game_type]
+                    tables_json = self.get_tables_json(game_type, tables)
+                    body = dumps_with({"success": True, "revision": revision, "delta": False,
+                                       "available_rates": self.available_rates},
+                                      "tables", tables_json).encode()
+                    cached = (revision, tables_json, body)
+                    self.snapshots[game_type] = cached
+        return cached[1], cached[2]
+    
+    def get_combined_snapshot(self, revisions):
+        """Poll body for every game at once, built once per set of game revisions"""
+        cached = self.snapshots.get(None)
+        if cached is None or cached[0] != revisions:
+            games = ','.join(f'"{game_type}":{self.get_snapshot(game_type, revision)[0]}'
+                             for game_type, revision in zip(self.registry.games, revisions))
+            body = dumps_with({"success": True,
+                               "revisions": dict(zip(self.registry.games, revisions)),
+                               "available_rates": self.available_rates},
+                              "games", '{' + games + '}').encode()
+            cached = (revisions, body)
+            self.snapshots[None] = cached
+        return cached[1]
+    
+    def tables_response(self, game_type, payload):
+        """JSON response of payload plus the game's current tables from the snapshot cache"""
+        tables_json = self.get_snapshot(game_type, self.game_revisions[game_type])[0]
+        return self.app.response_class(dumps_with(payload, "tables", tables_json), mimetype='application/json')
+    
+    def get_local_ip(self, host='0.0.0.0'):
+        """LAN address to print and open, found from the local routing table.
+        
+        Connecting a UDP socket only picks the outgoing interface; no packet is
+        sent, and the private address used needs no DNS or internet access.
+        """
+        if host not in ('0.0.0.0', ''):
+            return host
         try:
-            s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            s.connect(('8.8.8.8', 80))
-            ip = s.getsockname()[0]
-            s.close()
-            return ip
-        except:
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+                s.connect(('10.254.254.254', 1))
+                return s.getsockname()[0]
+        except OSError:
             return '127.0.0.1'
     
+    def announce_when_ready(self, host, port, url, open_browser, timeout=30):
+        """Once the server accepts connections, log the boot time and open the browser"""
+        probe_host = '127.0.0.1' if host in ('0.0.0.0', '') else host
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                with socket.create_connection((probe_host, port), timeout=0.2):
+                    break
+            except OSError:
+                time.sleep(0.02)
+        else:
+            logger.warning("server_not_ready port=%s timeout=%ss", port, timeout)
+            return
+        
+        boot_ms = (time.perf_counter() - self.boot_started) * 1000
+        logger.info("server_ready port=%s boot_ms=%.0f", port, boot_ms)
+        print(f"⏱️  Ready in {boot_ms:.0f} ms")
+        if open_browser:
+            try:
+                webbrowser.open(url)
+            except Exception:
+                pass
+    
     def get_login_html(self):
         return """<!DOCTYPE html>
 <html lang="en">
@@ -639,6 +2861,21 @@ class SimpleTableTracker:
 </html>"""
     
     def get_home_html(self):
+        game_cards = ''.join(f"""
+        <a href="/{game['key']}" class="game-card">
+            <span class="game-icon">{game['icon']}</span>
+            <div class="game-title">{game['name']}</div>
+            <div class="game-description">
+                {game['description']}
+            </div>
+            <span class="game-status status-active">✅ {game['table_count']} {game['unit'].lower()}s</span>
+        </a>
+        """ for game in self.registry.games.values())
+        mobile_links = '\n        '.join(
+            f'<a href="/{game["key"]}/mobile" class="mobile-link">📱 {game["name"]} Mobile</a>'
+            for game in self.registry.games.values()
+        )
+        
         return f"""<!DOCTYPE html>
 <html lang="en">
 <head>
@@ -825,41 +3062,20 @@ class SimpleTableTracker:
 </head>
 <body>
     <div class="user-info">
-        <span>👤 {current_user.username} ({current_user.role.title()})</span>
+        <span>👤 {{{{ username }}}} ({{{{ role|title }}}})</span>
         <a href="/logout" class="logout-btn">Logout</a>
     </div>
 
     <div class="header">
         <h1>🎯 Table Tracker</h1>
         <p>Professional Table Management System</p>
-        <p>Welcome, {current_user.username}!</p>
+        <p>Welcome, {{{{ username }}}}!</p>
     </div>
     
-    <div class="game-selection">
-        <a href="/snooker" class="game-card">
-            <span class="game-icon">🎱</span>
-            <div class="game-title">Snooker</div>
-            <div class="game-description">
-                Full-featured table tracking with timer, billing, and session management. 
-                Perfect for snooker halls and gaming centers.
-            </div>
-            <span class="game-status status-active">✅ Active</span>
-        </a>
-        
-        <a href="/pool" class="game-card">
-            <span class="game-icon">🎳</span>
-            <div class="game-title">Pool</div>
-            <div class="game-description">
-                Pool table management system with specialized lower rates. 
-                Perfect for pool halls and casual gaming.
-            </div>
-            <span class="game-status status-active">✅ Active</span>
-        </a>
-    </div>
+    <div class="game-selection">{game_cards}</div>
     
     <div class="mobile-links">
-        <a href="/snooker/mobile" class="mobile-link">📱 Snooker Mobile</a>
-        <a href="/pool/mobile" class="mobile-link">📱 Pool Mobile</a>
+        {mobile_links}
     </div>
     
     <div class="footer">
@@ -885,13 +3101,14 @@ class SimpleTableTracker:
 </body>
 </html>"""
 
-    def get_desktop_html(self, game_type):
-        icon = "🎱" if game_type == "snooker" else "🎳"
-        title = f"{game_type.title()} Tracker Desktop"
+    def get_desktop_html(self, game_type, role):
+        game = self.registry.games[game_type]
+        icon = game['icon']
+        title = f"{game['name']} Tracker Desktop"
         
         # Enhanced user management section for admin users with remove functionality
         user_management_html = ""
-        if current_user.role == 'admin':
+        if role == 'admin':
             user_management_html = """
             <div class="user-setting">
                 <h3>👥 User Management</h3>
@@ -924,7 +3141,7 @@ class SimpleTableTracker:
             scroll-behavior: auto;
             will-change: scroll-position;
             border: 1px solid rgba(255,255,255,0.3);
-        }""" if game_type == 'pool' else """
+        }""" if game['high_contrast'] else """
         .sessions-container {
             max-height: 200px;
             overflow-y: auto;
@@ -949,7 +3166,7 @@ class SimpleTableTracker:
             min-height: 32px;
             flex-shrink: 0;
             border: 1px solid rgba(255,255,255,0.2);
-        }""" if game_type == 'pool' else """
+        }""" if game['high_contrast'] else """
         .session-item {
             display: grid;
             grid-template-columns: 1fr 1fr 1fr 1fr;
@@ -981,7 +3198,7 @@ class SimpleTableTracker:
             background: rgba(0,0,0,0.3);
             border-radius: 8px;
             border: 1px solid rgba(255,255,255,0.2);
-        }""" if game_type == 'pool' else """
+        }""" if game['high_contrast'] else """
         .session-time { color: #3498db; font-weight: 600; }
         .session-duration { color: #f39c12; }
         .session-amount { color: #2ecc71; font-weight: 600; }
@@ -1007,7 +3224,7 @@ class SimpleTableTracker:
         * {{ box-sizing: border-box; margin: 0; padding: 0; }}
         body {{
             font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', sans-serif;
-            background: linear-gradient(135deg, {'#667eea 0%, #764ba2 100%' if game_type == 'snooker' else '#11998e 0%, #38ef7d 100%'});
+            background: linear-gradient(135deg, {game['gradient']});
             min-height: 100vh;
             padding: 20px;
             color: white;
@@ -1231,6 +3448,9 @@ class SimpleTableTracker:
             backdrop-filter: blur(15px);
             border: 1px solid rgba(255,255,255,0.2);
             transition: transform 0.3s ease;
+            /* Off-screen cards skip layout and paint in big halls */
+            content-visibility: auto;
+            contain-intrinsic-size: auto 560px;
         }}
         .table-card:hover {{ transform: translateY(-5px); }}
         .table-header {{
@@ -1344,7 +3564,7 @@ class SimpleTableTracker:
     </style>
 </head>
 <body>
-    <div class="user-info">👤 {current_user.username} ({current_user.role.title()})</div>
+    <div class="user-info">👤 {{{{ username }}}} ({{{{ role|title }}}})</div>
     <a href="/" class="home-btn">🏠 Home</a>
     <button class="settings-btn" onclick="toggleSettings()">⚙️</button>
     
@@ -1366,7 +3586,7 @@ class SimpleTableTracker:
     </div>
     
     <div class="status-bar">
-        <div>{icon} {game_type.title()} Interface</div>
+        <div>{icon} {game['name']} Interface</div>
         <div id="update-status">🔄 Loading...</div>
         <div id="current-time"></div>
     </div>
@@ -1375,58 +3595,142 @@ class SimpleTableTracker:
 
     <script>
         const GAME_TYPE = '{game_type}';
-        const USER_ROLE = '{current_user.role}';
-        const CURRENT_USER = '{current_user.username}';
-        
+        const UNIT_LABEL = {json.dumps(game['unit'])};
+        const USER_ROLE = '{role}';
+        const CURRENT_USER = {{{{ username|tojson }}}};
+    </script>
+    <script>
         class TableTracker {{
             constructor() {{
                 this.tables = {{}};
                 this.availableRates = [];
-                this.scrollPositions = {{}};
-                this.lastUpdateTime = 0;
+                this.sessionPages = {{}};
+                this.cards = {{}};
+                this.rateRows = {{}};
+                this.ratesKey = null;
+                this.renderedRevs = {{}};
+                this.pendingCards = [];
+                this.renderFrame = null;
+                this.revision = null;
+                this.etag = null;
+                this.clockOffset = 0;
+                this.pollTimer = null;
                 this.init();
             }}
             
             init() {{
-                this.loadTables();
                 this.updateClock();
-                setInterval(() => this.updateClock(), 1000);
-                setInterval(() => this.loadTables(), 1000);
+                setInterval(() => {{
+                    this.updateClock();
+                    this.tickTimers();
+                }}, 1000);
+                this.connectStream();
                 
                 if (USER_ROLE === 'admin') {{
                     this.loadUsers();
                 }}
             }}
             
+            connectStream() {{
+                if (!window.EventSource) {{
+                    // No push support: fall back to conditional polling
+                    this.startPolling();
+                    return;
+                }}
+                
+                const stream = new EventSource(`/api/${{GAME_TYPE}}/stream`);
+                // Resync on every (re)connect in case events were missed
+                stream.onopen = () => {{
+                    this.stopPolling();
+                    this.loadTables();
+                }};
+                stream.onerror = () => {{
+                    if (stream.readyState === EventSource.CLOSED) {{
+                        // Refused, e.g. the server is at its stream limit: poll, and try again later
+                        this.startPolling();
+                        setTimeout(() => this.connectStream(), 60000);
+                        return;
+                    }}
+                    document.getElementById('update-status').textContent = '🔴 Reconnecting...';
+                }};
+                stream.addEventListener('tables', event => this.applyEvent(JSON.parse(event.data)));
+                stream.addEventListener('resync', () => this.loadTables());
+                stream.addEventListener('users', () => {{
+                    if (USER_ROLE === 'admin') {{
+                        this.loadUsers();
+                    }}
+                }});
+            }}
+            
+            applyEvent(data) {{
+                this.clockOffset = data.server_time - Date.now();
+                if (this.revision !== null) {{
+                    this.revision = Math.max(this.revision, data.revision);
+                }}
+                if (!this.mergeTables(data.tables, false)) {{
+                    return;
+                }}
+                this.etag = null;
+                this.renderTables();
+                this.renderSettings();
+            }}
+            
+            // Tables share one revision counter but are published after committing, so events
+            // for different tables can arrive out of order: keep the newer version of each table
+            mergeTables(tables, replace) {{
+                const merged = replace ? {{}} : this.tables;
+                let changed = replace && Object.keys(tables).length !== Object.keys(this.tables).length;
+                for (const [id, table] of Object.entries(tables)) {{
+                    const held = this.tables[id];
+                    if (held && held.rev >= table.rev) {{
+                        merged[id] = held;
+                    }} else {{
+                        merged[id] = table;
+                        changed = true;
+                    }}
+                }}
+                this.tables = merged;
+                return changed;
+            }}
+            
+            startPolling() {{
+                if (!this.pollTimer) {{
+                    this.loadTables();
+                    this.pollTimer = setInterval(() => this.loadTables(), 1000);
+                }}
+            }}
+            
+            stopPolling() {{
+                clearInterval(this.pollTimer);
+                this.pollTimer = null;
+            }}
+            
             async loadTables() {{
                 try {{
-                    const now = Date.now();
-                    if (now - this.lastUpdateTime < 950) {{
+                    const url = this.revision === null ? `/api/${{GAME_TYPE}}/tables` : `/api/${{GAME_TYPE}}/tables?since=${{this.revision}}`;
+                    const response = await fetch(url, {{
+                        headers: this.etag ? {{'If-None-Match': this.etag}} : {{}}
+                    }});
+                    this.syncClock(response);
+                    
+                    if (response.status === 304) {{
+                        document.getElementById('update-status').textContent = '🟢 Live Updates';
                         return;
                     }}
-                    this.lastUpdateTime = now;
                     
-                    this.saveScrollPositions();
-                    
-                    const response = await fetch(`/api/${{GAME_TYPE}}/tables`);
                     const data = await response.json();
                     
                     if (data.success) {{
-                        const newTablesString = JSON.stringify(data.tables);
-                        const currentTablesString = JSON.stringify(this.tables);
+                        this.etag = response.headers.get('ETag');
+                        this.revision = data.revision;
+                        this.availableRates = data.available_rates;
                         
-                        if (newTablesString !== currentTablesString) {{
-                            this.tables = data.tables;
-                            this.availableRates = data.available_rates;
+                        if (this.mergeTables(data.tables, !data.delta)) {{
                             this.renderTables();
                             this.renderSettings();
-                            
-                            requestAnimationFrame(() => {{
-                                setTimeout(() => this.restoreScrollPositions(), 10);
-                            }});
                         }}
                         
-                        document.getElementById('update-status').textContent = '🟢 Live Updates (1sec)';
+                        document.getElementById('update-status').textContent = '🟢 Live Updates';
                     }}
                 }} catch (error) {{
                     console.error('Failed to load tables:', error);
@@ -1545,141 +3849,337 @@ class SimpleTableTracker:
                 }}
             }}
             
-            saveScrollPositions() {{
-                Object.keys(this.tables).forEach(tableId => {{
-                    const container = document.getElementById(`sessions-container-${{tableId}}`);
-                    if (container) {{
-                        this.scrollPositions[tableId] = container.scrollTop;
-                    }}
-                }});
+            updateClock() {{
+                const now = new Date();
+                document.getElementById('current-time').textContent = now.toLocaleTimeString();
             }}
             
-            restoreScrollPositions() {{
-                Object.keys(this.scrollPositions).forEach(tableId => {{
-                    const container = document.getElementById(`sessions-container-${{tableId}}`);
-                    if (container && this.scrollPositions[tableId] !== undefined) {{
-                        container.scrollTo({{
-                            top: this.scrollPositions[tableId],
-                            behavior: 'auto'
-                        }});
-                    }}
-                }});
+            syncClock(response) {{
+                const serverTime = parseFloat(response.headers.get('X-Server-Time'));
+                if (!isNaN(serverTime)) {{
+                    this.clockOffset = serverTime - Date.now();
+                }}
             }}
             
-            updateClock() {{
-                const now = new Date();
-                document.getElementById('current-time').textContent = now.toLocaleTimeString();
+            liveElapsed(table) {{
+                let elapsed = table.accumulated_seconds;
+                if (table.status === 'running' && table.started_at) {{
+                    elapsed += Math.max(0, (Date.now() + this.clockOffset) / 1000 - table.started_at);
+                }}
+                return Math.floor(elapsed);
+            }}
+            
+            formatElapsed(elapsed) {{
+                const minutes = Math.floor(elapsed / 60);
+                const seconds = elapsed % 60;
+                return `${{String(minutes).padStart(2, '0')}}:${{String(seconds).padStart(2, '0')}}`;
+            }}
+            
+            setText(parts, name, text) {{
+                // Touch the node only when its text actually changes
+                if (parts.shown[name] !== text) {{
+                    parts[name].textContent = text;
+                    parts.shown[name] = text;
+                }}
+            }}
+            
+            tickTimers() {{
+                Object.keys(this.tables).forEach(tableId => {{
+                    if (this.tables[tableId].status === 'running') {{
+                        this.patchTimer(tableId);
+                    }}
+                }});
             }}
             
             renderSettings() {{
+                // One row per table, built once; later renders only flip the
+                // active/disabled classes and the hint when rate or status change
                 const container = document.getElementById('rate-settings');
-                container.innerHTML = '';
+                const ratesKey = this.availableRates.join(',');
+                if (ratesKey !== this.ratesKey) {{
+                    container.innerHTML = '';
+                    this.rateRows = {{}};
+                    this.ratesKey = ratesKey;
+                }}
                 
                 Object.keys(this.tables).forEach(tableId => {{
                     const table = this.tables[tableId];
-                    const settingDiv = document.createElement('div');
-                    settingDiv.className = 'rate-setting';
-                    
-                    const rateOptions = this.availableRates.map(rate => {{
-                        const isActive = table.rate === rate;
-                        const isDisabled = table.status !== 'idle';
-                        return `<div class="rate-option ${{isActive ? 'active' : ''}} ${{isDisabled ? 'disabled' : ''}}" 
-                                    onclick="${{isDisabled ? '' : `tracker.updateRate(${{tableId}}, ${{rate}})`}}">
-                                    ₹${{rate}}/min
-                                </div>`;
-                    }}).join('');
-                    
-                    settingDiv.innerHTML = `
-                        <h3>Table ${{tableId}} Pricing</h3>
-                        <div style="margin-bottom: 10px; font-size: 12px; opacity: 0.8;">
-                            ${{table.status !== 'idle' ? '⚠️ Stop table to change rate' : 'Select rate per minute:'}}
-                        </div>
-                        <div class="rate-selector">
-                            ${{rateOptions}}
-                        </div>
-                    `;
+                    let row = this.rateRows[tableId];
+                    if (!row) {{
+                        row = this.rateRows[tableId] = this.createRateRow(tableId);
+                        container.appendChild(row.el);
+                    }}
                     
-                    container.appendChild(settingDiv);
+                    const locked = table.status !== 'idle';
+                    if (row.rate === table.rate && row.locked === locked) return;
+                    row.hint.textContent = locked ? '⚠️ Stop table to change rate' : 'Select rate per minute:';
+                    Object.keys(row.options).forEach(rate => {{
+                        row.options[rate].classList.toggle('active', table.rate === Number(rate));
+                        row.options[rate].classList.toggle('disabled', locked);
+                    }});
+                    row.rate = table.rate;
+                    row.locked = locked;
+                }});
+            }}
+            
+            createRateRow(tableId) {{
+                const el = document.createElement('div');
+                el.className = 'rate-setting';
+                el.innerHTML = `
+                    <h3>${{UNIT_LABEL}} ${{tableId}} Pricing</h3>
+                    <div style="margin-bottom: 10px; font-size: 12px; opacity: 0.8;"></div>
+                    <div class="rate-selector">
+                        ${{this.availableRates.map(rate => 
+                            `<div class="rate-option" data-rate="${{rate}}" onclick="tracker.pickRate(${{tableId}}, ${{rate}})">₹${{rate}}/min</div>`
+                        ).join('')}}
+                    </div>
+                `;
+                const options = {{}};
+                el.querySelectorAll('.rate-option').forEach(option => {{
+                    options[option.dataset.rate] = option;
                 }});
+                return {{el: el, hint: el.children[1], options: options, rate: null, locked: null}};
+            }}
+            
+            pickRate(tableId, rate) {{
+                if (this.tables[tableId].status !== 'idle') return;
+                this.updateRate(tableId, rate);
             }}
             
             renderTables() {{
+                // Cards are keyed by table id: created once, then patched in place
                 const container = document.getElementById('tables-container');
+                const tableIds = Object.keys(this.tables);
                 
-                const currentTableCount = container.children.length;
-                const expectedTableCount = Object.keys(this.tables).length;
-                
-                if (currentTableCount !== expectedTableCount) {{
-                    container.innerHTML = '';
-                }}
-                
-                Object.keys(this.tables).forEach(tableId => {{
-                    const table = this.tables[tableId];
-                    let card = document.getElementById(`table-card-${{tableId}}`);
-                    
-                    if (!card) {{
-                        card = document.createElement('div');
-                        card.className = 'table-card';
-                        card.id = `table-card-${{tableId}}`;
-                        container.appendChild(card);
+                Object.keys(this.cards).forEach(tableId => {{
+                    if (!(tableId in this.tables)) {{
+                        this.cards[tableId].el.remove();
+                        delete this.cards[tableId];
+                        delete this.renderedRevs[tableId];
                     }}
-                    
-                    let sessionsHTML = '';
-                    if (table.sessions && table.sessions.length > 0) {{
-                        sessionsHTML = table.sessions.map(session => 
-                            `<div class="session-item">
-                                <div class="session-time">${{session.start_time}} - ${{session.end_time}}</div>
-                                <div class="session-duration">${{session.duration}}min</div>
-                                <div class="session-amount">₹${{session.amount}}</div>
-                                <div class="session-date">${{session.date}}</div>
-                            </div>`
-                        ).join('');
-                    }} else {{
-                        sessionsHTML = '<div class="no-sessions">No sessions recorded yet</div>';
+                }});
+                const created = document.createDocumentFragment();
+                tableIds.forEach(tableId => {{
+                    if (!this.cards[tableId]) {{
+                        created.appendChild(this.createCard(tableId));
                     }}
-                    
-                    card.innerHTML = `
-                        <div class="table-header">
-                            <div class="table-name">Table ${{tableId}}</div>
-                            <div class="table-status status-${{table.status}}">${{table.status}}</div>
-                        </div>
-                        <div class="table-time">${{table.time}}</div>
-                        <div class="table-info">
-                            <div class="info-item">
-                                <div>Rate</div>
-                                <strong>₹${{table.rate}}/min</strong>
-                            </div>
-                            <div class="info-item">
-                                <div>Current Amount</div>
-                                <strong>₹${{table.amount.toFixed(2)}}</strong>
-                            </div>
+                }});
+                if (created.childNodes.length) {{
+                    container.appendChild(created);
+                }}
+                
+                // Patch only the cards whose table changed, a chunk per animation
+                // frame, so a hall with hundreds of tables never blocks the page
+                this.pendingCards = tableIds.filter(tableId => this.renderedRevs[tableId] !== this.tables[tableId].rev);
+                if (this.pendingCards.length && !this.renderFrame) {{
+                    this.renderFrame = requestAnimationFrame(() => this.renderCardChunk());
+                }}
+            }}
+            
+            renderCardChunk() {{
+                this.renderFrame = null;
+                this.pendingCards.splice(0, 24).forEach(tableId => this.patchCard(tableId));
+                if (this.pendingCards.length) {{
+                    this.renderFrame = requestAnimationFrame(() => this.renderCardChunk());
+                }}
+            }}
+            
+            createCard(tableId) {{
+                const el = document.createElement('div');
+                el.className = 'table-card';
+                el.id = `table-card-${{tableId}}`;
+                el.innerHTML = `
+                    <div class="table-header">
+                        <div class="table-name">${{UNIT_LABEL}} ${{tableId}}</div>
+                        <div class="table-status" data-part="status"></div>
+                    </div>
+                    <div class="table-time" data-part="time"></div>
+                    <div class="table-info">
+                        <div class="info-item">
+                            <div>Rate</div>
+                            <strong data-part="rate"></strong>
                         </div>
-                        <div class="controls">
-                            <button class="control-btn btn-start" onclick="tracker.sendAction(${{tableId}}, 'start')">START</button>
-                            <button class="control-btn btn-pause" onclick="tracker.sendAction(${{tableId}}, 'pause')">PAUSE</button>
-                            <button class="control-btn btn-end" onclick="tracker.sendAction(${{tableId}}, 'end')">END</button>
+                        <div class="info-item">
+                            <div>Current Amount</div>
+                            <strong data-part="amount"></strong>
                         </div>
-                        <div class="sessions-section">
-                            <div class="sessions-header">
-                                <div class="sessions-title">📊 Session History</div>
-                                <div>
-                                    <button class="clear-btn" onclick="tracker.splitAmount(${{tableId}})" 
-                                            ${{table.sessions && table.sessions.length > 0 ? '' : 'style="opacity: 0.5;" disabled'}}
-                                            style="margin-right: 5px; background: #3498db;">
-                                        💰 Split
-                                    </button>
-                                    <button class="clear-btn" onclick="tracker.clearTableData(${{tableId}})" 
-                                            ${{table.sessions && table.sessions.length > 0 ? '' : 'style="opacity: 0.5;" disabled'}}>
-                                        🗑️ Clear Data
-                                    </button>
-                                </div>
-                            </div>
-                            <div class="sessions-container" id="sessions-container-${{tableId}}">
-                                ${{sessionsHTML}}
+                    </div>
+                    <div class="controls">
+                        <button class="control-btn btn-start" onclick="tracker.sendAction(${{tableId}}, 'start')">START</button>
+                        <button class="control-btn btn-pause" onclick="tracker.sendAction(${{tableId}}, 'pause')">PAUSE</button>
+                        <button class="control-btn btn-end" onclick="tracker.sendAction(${{tableId}}, 'end')">END</button>
+                    </div>
+                    <div class="sessions-section">
+                        <div class="sessions-header">
+                            <div class="sessions-title">📊 Session History</div>
+                            <div>
+                                <button class="clear-btn" data-part="split" onclick="tracker.splitAmount(${{tableId}})" 
+                                        style="margin-right: 5px; background: #3498db;">
+                                    💰 Split
+                                </button>
+                                <button class="clear-btn" data-part="clear" onclick="tracker.clearTableData(${{tableId}})">
+                                    🗑️ Clear Data
+                                </button>
                             </div>
                         </div>
-                    `;
+                        <div class="sessions-container" data-part="sessions">
+                            <div class="no-sessions" data-part="placeholder"></div>
+                            <button class="clear-btn" data-part="more" style="width: 100%; background: #34495e; display: none;"
+                                    onclick="tracker.loadSessions(${{tableId}}, true)">Load older sessions</button>
+                        </div>
+                    </div>
+                `;
+                
+                // Direct references to every node a render may change, plus the
+                // values last written to them
+                const parts = {{el: el, shown: {{}}}};
+                el.querySelectorAll('[data-part]').forEach(node => {{
+                    parts[node.dataset.part] = node;
                 }});
+                this.cards[tableId] = parts;
+                return el;
+            }}
+            
+            patchCard(tableId) {{
+                const table = this.tables[tableId];
+                const parts = this.cards[tableId];
+                if (!table || !parts) return;
+                this.renderedRevs[tableId] = table.rev;
+                
+                if (parts.shown.status !== table.status) {{
+                    parts.status.className = `table-status status-${{table.status}}`;
+                }}
+                this.setText(parts, 'status', table.status);
+                this.setText(parts, 'rate', `₹${{table.rate}}/min`);
+                this.patchTimer(tableId);
+                
+                const hasSessions = table.session_count > 0;
+                if (parts.shown.hasSessions !== hasSessions) {{
+                    [parts.split, parts.clear].forEach(button => {{
+                        button.disabled = !hasSessions;
+                        button.style.opacity = hasSessions ? '' : '0.5';
+                    }});
+                    parts.shown.hasSessions = hasSessions;
+                }}
+                
+                const page = this.sessionPages[tableId];
+                if (!page || page.count !== table.session_count) {{
+                    this.loadSessions(tableId);
+                }}
+                this.patchSessionsState(tableId);
+            }}
+            
+            patchTimer(tableId) {{
+                const table = this.tables[tableId];
+                const parts = this.cards[tableId];
+                if (!parts) return;
+                const elapsed = this.liveElapsed(table);
+                this.setText(parts, 'time', this.formatElapsed(elapsed));
+                this.setText(parts, 'amount', `₹${{(elapsed / 60 * table.rate).toFixed(2)}}`);
+            }}
+            
+            sessionRow(session) {{
+                const row = document.createElement('div');
+                row.className = 'session-item';
+                row.innerHTML = `
+                    <div class="session-time">${{session.start_time}} - ${{session.end_time}}</div>
+                    <div class="session-duration">${{session.duration}}min</div>
+                    <div class="session-amount">₹${{session.amount}}</div>
+                    <div class="session-date">${{session.date}}</div>
+                `;
+                return row;
+            }}
+            
+            addSessionRows(tableId, sessions, newest) {{
+                // Newer sessions go above the rows already shown, older ones below
+                const parts = this.cards[tableId];
+                if (!parts || !sessions.length) return;
+                const rows = document.createDocumentFragment();
+                sessions.forEach(session => rows.appendChild(this.sessionRow(session)));
+                parts.sessions.insertBefore(rows, newest ? parts.sessions.firstChild : parts.placeholder);
+            }}
+            
+            clearSessionRows(tableId) {{
+                const parts = this.cards[tableId];
+                if (!parts) return;
+                while (parts.sessions.firstChild !== parts.placeholder) {{
+                    parts.sessions.removeChild(parts.sessions.firstChild);
+                }}
+            }}
+            
+            patchSessionsState(tableId) {{
+                const parts = this.cards[tableId];
+                const page = this.sessionPages[tableId];
+                if (!parts) return;
+                const count = this.tables[tableId].session_count;
+                const loaded = page && page.loaded;
+                const text = !count ? 'No sessions recorded yet' : (loaded ? '' : 'Loading sessions...');
+                
+                this.setText(parts, 'placeholder', text);
+                parts.placeholder.style.display = text ? '' : 'none';
+                parts.more.style.display = count && loaded && page.cursor !== null ? '' : 'none';
+            }}
+            
+            async loadSessions(tableId, older = false) {{
+                // History is fetched page by page, newest first. When the session
+                // count grows only the sessions newer than the newest shown are
+                // fetched and added on top; when it drops (cleared) the list starts over
+                const table = this.tables[tableId];
+                let page = this.sessionPages[tableId];
+                if (!page) {{
+                    page = this.sessionPages[tableId] = {{count: null, newest: null, cursor: null, loaded: false, loading: false}};
+                }}
+                if (page.loading) return;
+                
+                const count = table.session_count;
+                if (!older && count === 0) {{
+                    this.clearSessionRows(tableId);
+                    Object.assign(page, {{count: 0, newest: null, cursor: null, loaded: true}});
+                    this.patchSessionsState(tableId);
+                    return;
+                }}
+                
+                const fresh = !older && (!page.loaded || page.newest === null || count < page.count);
+                let url = `/api/${{GAME_TYPE}}/table/${{tableId}}/sessions?limit=50`;
+                if (older) {{
+                    url += `&before=${{page.cursor}}`;
+                }} else {{
+                    if (!fresh) {{
+                        url += `&after=${{page.newest}}`;
+                    }}
+                    page.count = count;
+                }}
+                page.loading = true;
+                
+                try {{
+                    const response = await fetch(url);
+                    const data = await response.json();
+                    if (!data.success) return;
+                    
+                    if (older) {{
+                        this.addSessionRows(tableId, data.sessions, false);
+                        page.cursor = data.next_cursor;
+                    }} else {{
+                        // More new sessions than one page: show that page on its own
+                        if (fresh || data.next_cursor !== null) {{
+                            this.clearSessionRows(tableId);
+                            page.cursor = data.next_cursor;
+                        }}
+                        this.addSessionRows(tableId, data.sessions, true);
+                        if (data.sessions.length) {{
+                            page.newest = data.sessions[0].id;
+                        }}
+                        page.loaded = true;
+                    }}
+                    this.patchSessionsState(tableId);
+                }} catch (error) {{
+                    console.error('Failed to load sessions:', error);
+                }} finally {{
+                    page.loading = false;
+                    if (page.count !== this.tables[tableId].session_count) {{
+                        this.loadSessions(tableId);
+                    }}
+                }}
             }}
             
             async sendAction(tableId, action) {{
@@ -1690,14 +4190,14 @@ class SimpleTableTracker:
                         body: JSON.stringify({{action: action}})
                     }});
                     
+                    this.syncClock(response);
                     const result = await response.json();
                     if (result.success) {{
                         console.log(`Action successful: ${{result.result}}`);
                         if (result.tables) {{
-                            this.tables = result.tables;
+                            this.mergeTables(result.tables, true);
                             this.renderTables();
                             this.renderSettings();
-                            setTimeout(() => this.restoreScrollPositions(), 10);
                         }}
                     }} else {{
                         console.error('Action failed:', result.error);
@@ -1717,9 +4217,9 @@ class SimpleTableTracker:
                     
                     const result = await response.json();
                     if (result.success) {{
-                        console.log(`Rate updated: Table ${{tableId}} - ₹${{newRate}}/min`);
+                        console.log(`Rate updated: ${{UNIT_LABEL}} ${{tableId}} - ₹${{newRate}}/min`);
                         if (result.tables) {{
-                            this.tables = result.tables;
+                            this.mergeTables(result.tables, true);
                             this.renderTables();
                             this.renderSettings();
                         }}
@@ -1732,7 +4232,7 @@ class SimpleTableTracker:
             }}
             
             async clearTableData(tableId) {{
-                if (!confirm(`Are you sure you want to clear all session data for Table ${{tableId}}?`)) {{
+                if (!confirm(`Are you sure you want to clear all session data for ${{UNIT_LABEL}} ${{tableId}}?`)) {{
                     return;
                 }}
                 
@@ -1744,9 +4244,9 @@ class SimpleTableTracker:
                     
                     const result = await response.json();
                     if (result.success) {{
-                        console.log(`Table ${{tableId}} data cleared`);
+                        console.log(`${{UNIT_LABEL}} ${{tableId}} data cleared`);
                         if (result.tables) {{
-                            this.tables = result.tables;
+                            this.mergeTables(result.tables, true);
                             this.renderTables();
                         }}
                     }} else {{
@@ -1770,7 +4270,7 @@ class SimpleTableTracker:
                     
                     const result = await response.json();
                     if (result.success) {{
-                        alert(`Split Result for Table ${{tableId}}:\\n\\nTotal: ₹${{result.total_amount.toFixed(2)}}\\nPlayers: ${{result.players}}\\nPer Player: ₹${{result.per_player.toFixed(2)}}`);
+                        alert(`Split Result for ${{UNIT_LABEL}} ${{tableId}}:\\n\\nTotal: ₹${{result.total_amount.toFixed(2)}}\\nPlayers: ${{result.players}}\\nPer Player: ₹${{result.per_player.toFixed(2)}}`);
                     }} else {{
                         alert(`Error: ${{result.error}}`);
                     }}
@@ -1791,8 +4291,9 @@ class SimpleTableTracker:
 </html>"""
 
     def get_mobile_html(self, game_type):
-        icon = "🎱" if game_type == "snooker" else "🎳"
-        title = f"{game_type.title()} Remote"
+        game = self.registry.games[game_type]
+        icon = game['icon']
+        title = f"{game['name']} Remote"
         
         return f"""<!DOCTYPE html>
 <html lang="en">
@@ -1804,7 +4305,7 @@ class SimpleTableTracker:
         * {{ box-sizing: border-box; margin: 0; padding: 0; }}
         body {{
             font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', sans-serif;
-            background: linear-gradient(135deg, {'#667eea 0%, #764ba2 100%' if game_type == 'snooker' else '#11998e 0%, #38ef7d 100%'});
+            background: linear-gradient(135deg, {game['gradient']});
             color: white;
             min-height: 100vh;
             padding: 20px;
@@ -1857,6 +4358,8 @@ class SimpleTableTracker:
             margin-bottom: 20px;
             backdrop-filter: blur(15px);
             border: 1px solid rgba(255,255,255,0.2);
+            content-visibility: auto;
+            contain-intrinsic-size: auto 320px;
         }}
         .table-header {{
             display: flex;
@@ -1936,7 +4439,7 @@ class SimpleTableTracker:
 <body>
     <div class="header">
         <a href="/" class="home-btn">🏠 Home</a>
-        <div class="user-info">{current_user.username}</div>
+        <div class="user-info">{{{{ username }}}}</div>
         <h1>{icon} {title}</h1>
     </div>
     
@@ -1944,33 +4447,119 @@ class SimpleTableTracker:
     <div id="tables-container"></div>
     
     <div class="footer">
-        Remote control for {game_type.title()} Tables<br>
-        Auto-updates every 1 second
+        Remote control for {game['name']} {game['unit']}s<br>
+        Live updates pushed from the server
     </div>
 
     <script>
         const GAME_TYPE = '{game_type}';
-        
+        const UNIT_LABEL = {json.dumps(game['unit'])};
+    </script>
+    <script>
         class MobileRemote {{
             constructor() {{
                 this.tables = {{}};
+                this.revision = null;
+                this.etag = null;
+                this.clockOffset = 0;
+                this.renderedRevs = {{}};
+                this.pendingCards = [];
+                this.renderFrame = null;
+                this.pollTimer = null;
                 this.init();
             }}
             
             init() {{
-                this.loadTables();
-                setInterval(() => this.loadTables(), 1000);
+                setInterval(() => this.tickTimers(), 1000);
+                this.connectStream();
+            }}
+            
+            connectStream() {{
+                if (!window.EventSource) {{
+                    this.startPolling();
+                    return;
+                }}
+                
+                const stream = new EventSource(`/api/${{GAME_TYPE}}/stream`);
+                stream.onopen = () => {{
+                    this.stopPolling();
+                    this.loadTables();
+                }};
+                stream.onerror = () => {{
+                    if (stream.readyState === EventSource.CLOSED) {{
+                        // Refused, e.g. the server is at its stream limit: poll, and try again later
+                        this.startPolling();
+                        setTimeout(() => this.connectStream(), 60000);
+                        return;
+                    }}
+                    document.getElementById('connection-status').innerHTML = '🔴 Reconnecting...';
+                }};
+                stream.addEventListener('tables', event => {{
+                    const data = JSON.parse(event.data);
+                    this.clockOffset = data.server_time - Date.now();
+                    if (this.revision !== null) {{
+                        this.revision = Math.max(this.revision, data.revision);
+                    }}
+                    if (this.mergeTables(data.tables, false)) {{
+                        this.etag = null;
+                        this.renderTables();
+                    }}
+                }});
+                stream.addEventListener('resync', () => this.loadTables());
+            }}
+            
+            // Tables share one revision counter but are published after committing, so events
+            // for different tables can arrive out of order: keep the newer version of each table
+            mergeTables(tables, replace) {{
+                const merged = replace ? {{}} : this.tables;
+                let changed = replace && Object.keys(tables).length !== Object.keys(this.tables).length;
+                for (const [id, table] of Object.entries(tables)) {{
+                    const held = this.tables[id];
+                    if (held && held.rev >= table.rev) {{
+                        merged[id] = held;
+                    }} else {{
+                        merged[id] = table;
+                        changed = true;
+                    }}
+                }}
+                this.tables = merged;
+                return changed;
+            }}
+            
+            startPolling() {{
+                if (!this.pollTimer) {{
+                    this.loadTables();
+                    this.pollTimer = setInterval(() => this.loadTables(), 1000);
+                }}
+            }}
+            
+            stopPolling() {{
+                clearInterval(this.pollTimer);
+                this.pollTimer = null;
             }}
             
             async loadTables() {{
                 try {{
-                    const response = await fetch(`/api/${{GAME_TYPE}}/tables`);
+                    const url = this.revision === null ? `/api/${{GAME_TYPE}}/tables` : `/api/${{GAME_TYPE}}/tables?since=${{this.revision}}`;
+                    const response = await fetch(url, {{
+                        headers: this.etag ? {{'If-None-Match': this.etag}} : {{}}
+                    }});
+                    this.syncClock(response);
+                    
+                    if (response.status === 304) {{
+                        document.getElementById('connection-status').innerHTML = '🟢 Connected • Live updates';
+                        return;
+                    }}
+                    
                     const data = await response.json();
                     
                     if (data.success) {{
-                        this.tables = data.tables;
-                        this.renderTables();
-                        document.getElementById('connection-status').innerHTML = '🟢 Connected • Live updates (1sec)';
+                        this.etag = response.headers.get('ETag');
+                        this.revision = data.revision;
+                        if (this.mergeTables(data.tables, !data.delta)) {{
+                            this.renderTables();
+                        }}
+                        document.getElementById('connection-status').innerHTML = '🟢 Connected • Live updates';
                     }}
                 }} catch (error) {{
                     console.error('Failed to load tables:', error);
@@ -1978,48 +4567,107 @@ class SimpleTableTracker:
                 }}
             }}
             
-            renderTables() {{
-                const container = document.getElementById('tables-container');
-                container.innerHTML = '';
-                
+            syncClock(response) {{
+                const serverTime = parseFloat(response.headers.get('X-Server-Time'));
+                if (!isNaN(serverTime)) {{
+                    this.clockOffset = serverTime - Date.now();
+                }}
+            }}
+            
+            liveElapsed(table) {{
+                let elapsed = table.accumulated_seconds;
+                if (table.status === 'running' && table.started_at) {{
+                    elapsed += Math.max(0, (Date.now() + this.clockOffset) / 1000 - table.started_at);
+                }}
+                return Math.floor(elapsed);
+            }}
+            
+            formatElapsed(elapsed) {{
+                const minutes = Math.floor(elapsed / 60);
+                const seconds = elapsed % 60;
+                return `${{String(minutes).padStart(2, '0')}}:${{String(seconds).padStart(2, '0')}}`;
+            }}
+            
+            tickTimers() {{
                 Object.keys(this.tables).forEach(tableId => {{
                     const table = this.tables[tableId];
-                    const card = document.createElement('div');
-                    card.className = 'table-card';
+                    if (table.status !== 'running') return;
                     
-                    let recentSessionsHTML = '';
-                    if (table.sessions && table.sessions.length > 0) {{
-                        const recent = table.sessions.slice(-3);
-                        recentSessionsHTML = `
-                            <div class="recent-sessions">
-                                <div class="sessions-title">Recent Sessions (${{table.sessions.length}} total)</div>
-                                ${{recent.map(session => 
-                                    `<div class="session-summary">
-                                        <span>${{session.start_time}}-${{session.end_time}}</span>
-                                        <span>${{session.duration}}min - ₹${{session.amount}}</span>
-                                    </div>`
-                                ).join('')}}
+                    const elapsed = this.liveElapsed(table);
+                    const timeEl = document.getElementById(`table-time-${{tableId}}`);
+                    const amountEl = document.getElementById(`table-amount-${{tableId}}`);
+                    if (timeEl) timeEl.textContent = this.formatElapsed(elapsed);
+                    if (amountEl) amountEl.textContent = `₹${{(elapsed / 60 * table.rate).toFixed(2)}} (₹${{table.rate}}/min)`;
+                }});
+            }}
+            
+            renderTables() {{
+                const container = document.getElementById('tables-container');
+                const tableIds = Object.keys(this.tables);
+                
+                if (container.children.length !== tableIds.length) {{
+                    container.innerHTML = '';
+                    this.renderedRevs = {{}};
+                    const shells = document.createDocumentFragment();
+                    tableIds.forEach(tableId => {{
+                        const card = document.createElement('div');
+                        card.className = 'table-card';
+                        card.id = `table-card-${{tableId}}`;
+                        shells.appendChild(card);
+                    }});
+                    container.appendChild(shells);
+                }}
+                
+                // Only changed cards are rebuilt, a chunk per animation frame
+                this.pendingCards = tableIds.filter(tableId => this.renderedRevs[tableId] !== this.tables[tableId].rev);
+                if (this.pendingCards.length && !this.renderFrame) {{
+                    this.renderFrame = requestAnimationFrame(() => this.renderCardChunk());
+                }}
+            }}
+            
+            renderCardChunk() {{
+                this.renderFrame = null;
+                this.pendingCards.splice(0, 24).forEach(tableId => this.renderCard(tableId));
+                if (this.pendingCards.length) {{
+                    this.renderFrame = requestAnimationFrame(() => this.renderCardChunk());
+                }}
+            }}
+            
+            renderCard(tableId) {{
+                const table = this.tables[tableId];
+                const card = document.getElementById(`table-card-${{tableId}}`);
+                if (!table || !card) return;
+                this.renderedRevs[tableId] = table.rev;
+                const elapsed = this.liveElapsed(table);
+                
+                let recentSessionsHTML = '';
+                if (table.last_session) {{
+                    const session = table.last_session;
+                    recentSessionsHTML = `
+                        <div class="recent-sessions">
+                            <div class="sessions-title">Last Session (${{table.session_count}} total)</div>
+                            <div class="session-summary">
+                                <span>${{session.start_time}}-${{session.end_time}}</span>
+                                <span>${{session.duration}}min - ₹${{session.amount}}</span>
                             </div>
-                        `;
-                    }}
-                    
-                    card.innerHTML = `
-                        <div class="table-header">
-                            <div class="table-name">Table ${{tableId}}</div>
-                            <div class="table-status status-${{table.status}}">${{table.status}}</div>
-                        </div>
-                        <div class="table-time">${{table.time}}</div>
-                        <div class="table-amount">₹${{table.amount.toFixed(2)}} (₹${{table.rate}}/min)</div>
-                        <div class="controls">
-                            <button class="control-btn btn-start" onclick="remote.sendAction(${{tableId}}, 'start')">START</button>
-                            <button class="control-btn btn-pause" onclick="remote.sendAction(${{tableId}}, 'pause')">PAUSE</button>
-                            <button class="control-btn btn-end" onclick="remote.sendAction(${{tableId}}, 'end')">END</button>
                         </div>
-                        ${{recentSessionsHTML}}
                     `;
-                    
-                    container.appendChild(card);
-                }});
+                }}
+                
+                card.innerHTML = `
+                    <div class="table-header">
+                        <div class="table-name">${{UNIT_LABEL}} ${{tableId}}</div>
+                        <div class="table-status status-${{table.status}}">${{table.status}}</div>
+                    </div>
+                    <div class="table-time" id="table-time-${{tableId}}">${{this.formatElapsed(elapsed)}}</div>
+                    <div class="table-amount" id="table-amount-${{tableId}}">₹${{(elapsed / 60 * table.rate).toFixed(2)}} (₹${{table.rate}}/min)</div>
+                    <div class="controls">
+                        <button class="control-btn btn-start" onclick="remote.sendAction(${{tableId}}, 'start')">START</button>
+                        <button class="control-btn btn-pause" onclick="remote.sendAction(${{tableId}}, 'pause')">PAUSE</button>
+                        <button class="control-btn btn-end" onclick="remote.sendAction(${{tableId}}, 'end')">END</button>
+                    </div>
+                    ${{recentSessionsHTML}}
+                `;
             }}
             
             async sendAction(tableId, action) {{
@@ -2030,10 +4678,11 @@ class SimpleTableTracker:
                         body: JSON.stringify({{action: action}})
                     }});
                     
+                    this.syncClock(response);
                     const result = await response.json();
                     if (result.success) {{
                         if (result.tables) {{
-                            this.tables = result.tables;
+                            this.mergeTables(result.tables, true);
                             this.renderTables();
                         }}
                     }}
@@ -2048,19 +4697,23 @@ class SimpleTableTracker:
 </body>
 </html>"""
     
-    def start(self):
-        local_ip = self.get_local_ip()
+    def start(self, host='0.0.0.0', port=8080, serve=False, threads=None, backlog=1024,
+              keepalive=120, open_browser=True, max_streams=32):
+        local_ip = self.get_local_ip(host)
         
         print("\n" + "="*60)
         print("🚀 ENHANCED TABLE TRACKER - WITH COMPLETE USER MANAGEMENT")
         print("="*60)
-        print(f"🔐 Login Page: http://{local_ip}:8080")
-        print(f"🏠 Home Page: http://{local_ip}:8080 (after login)")
-        print(f"🎱 Snooker Desktop: http://{local_ip}:8080/snooker")
-        print(f"📱 Snooker Mobile: http://{local_ip}:8080/snooker/mobile")
-        print(f"🎳 Pool Desktop: http://{local_ip}:8080/pool")
-        print(f"📱 Pool Mobile: http://{local_ip}:8080/pool/mobile")
+        print(f"🔐 Login Page: http://{local_ip}:{port}")
+        print(f"🏠 Home Page: http://{local_ip}:{port} (after login)")
+        for game in self.registry.games.values():
+            print(f"{game['icon']} {game['name']} Desktop ({game['table_count']} {game['unit'].lower()}s): http://{local_ip}:{port}/{game['key']}")
+            print(f"📱 {game['name']} Mobile: http://{local_ip}:{port}/{game['key']}/mobile")
         print(f"🌐 Local IP: {local_ip}")
+        if serve:
+            threads, stream_limit = serving_capacity(threads, max_streams)
+            print(f"🏭 Production server: waitress, {threads} threads ({stream_limit} live streams), "
+                  f"backlog {backlog}, keep-alive {keepalive}s")
         print("="*60)
         print("🔑 LOGIN CREDENTIALS:")
         print("   👑 Admin: username=admin, password=admin123")
@@ -2086,7 +4739,7 @@ class SimpleTableTracker:
         print("   • Confirmation before deletion")
         print("   • Real-time user list updates")
         print("   • Input validation (username ≥3, password ≥6)")
-        print("   • Activity logging in console")
+        print(f"   • Activity logging in console (level {logging.getLevelName(logging.getLogger().level)})")
         print("="*60)
         print("📝 Usage:")
         print("   1. Open browser → Login page appears first")
@@ -2096,29 +4749,172 @@ class SimpleTableTracker:
         print("   5. Press Ctrl+C to stop")
         print("="*60)
         
-        # Start timer thread
-        timer_thread = threading.Thread(target=self.update_timers)
-        timer_thread.daemon = True
-        timer_thread.start()
-        
-        # Auto-open login page
-        try:
-            webbrowser.open(f'http://{local_ip}:8080')
-        except:
-            pass
+        # Report readiness (and open the login page) only once the port is bound
+        ready = threading.Thread(target=self.announce_when_ready, name="ready-probe",
+                                 args=(host, port, f'http://{local_ip}:{port}', open_browser))
+        ready.daemon = True
+        ready.start()
         
-        # Start Flask server (blocking)
+        # Start server (blocking)
         try:
-            self.app.run(host='0.0.0.0', port=8080, debug=False, threaded=True)
+            if serve:
+                self.serve_production(host, port, threads, backlog, keepalive, max_streams=max_streams)
+            else:
+                self.app.run(host=host, port=port, debug=False, threaded=True)
         except KeyboardInterrupt:
             print("\n\n⏹️ Server stopped by user")
-            self.running = False
+    
+    def serve_production(self, host, port, threads, backlog, keepalive, sock=None, max_streams=32):
+        """Serve the app with waitress: a fixed worker-thread pool fed by an async socket loop.
+        
+        Each open page holds a live-update stream and with it a worker thread, so
+        streams are limited (see serving_capacity) and pages past the limit fall
+        back to polling. With sock, accept on that already-listening socket
+        instead of binding host:port.
+        """
+        try:
+            from waitress import serve
+        except ImportError:
+            print("❌ Production mode needs waitress: pip install waitress")
+            raise SystemExit(1)
+        
+        threads, stream_limit = serving_capacity(threads, max_streams)
+        self.stream_slots = threading.BoundedSemaphore(stream_limit)
+        
+        listen = {"sockets": [sock]} if sock is not None else {"host": host, "port": port}
+        serve(
+            self.app,
+            **listen,
+            threads=threads,
+            backlog=backlog,
+            channel_timeout=keepalive,
+            connection_limit=max(100, threads * 8),
+            ident='TableTracker'
+        )
+
+def serving_capacity(threads, max_streams):
+    """(waitress threads, live-update streams allowed at once) for --serve.
+    
+    A stream holds a waitress thread for as long as its page stays open, so
+    streams are capped below the thread count. The remaining threads stay free
+    for polls and actions, and pages refused a stream poll instead. Without an
+    explicit thread count, the pool is sized to fit max_streams.
+    """
+    if threads is None:
+        threads = max_streams + max(2, max_streams // 2)
+    return threads, max(1, min(max_streams, threads - max(2, threads // 3)))
+
+
+def run_worker(args, sock):
+    """One --workers process: its own tracker on the shared state backend, serving sock"""
+    setup_logging(args.log_level)
+    tracker = SimpleTableTracker(args.data_dir, args.tables_config, args.rollover_hour, shared_state=True,
+                                 audit_fsync=args.audit_fsync)
+    try:
+        tracker.serve_production(args.host, args.port, args.threads, args.backlog, args.keepalive, sock=sock,
+                                 max_streams=args.max_streams)
+    except KeyboardInterrupt:
+        pass
+
+
+def serve_workers(args):
+    """Run args.workers waitress processes accepting on one listening socket.
+    
+    Table state goes through SQLiteStateBackend so every worker sees the same
+    tables. Each worker builds its tracker after the fork, so no database
+    connection or thread crosses a process boundary.
+    """
+    import multiprocessing
+    import signal
+    
+    if 'fork' not in multiprocessing.get_all_start_methods():
+        print("❌ --workers needs a platform with fork(); run a single process instead")
+        raise SystemExit(1)
+    
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.host, args.port))
+    sock.listen(args.backlog)
+    
+    context = multiprocessing.get_context('fork')
+    workers = [context.Process(target=run_worker, args=(args, sock), name=f"worker-{n}", daemon=True)
+               for n in range(1, args.workers + 1)]
+    for worker in workers:
+        worker.start()
+    threads, stream_limit = serving_capacity(args.threads, args.max_streams)
+    print(f"🏭 {args.workers} waitress workers x {threads} threads ({stream_limit} live streams) "
+          f"on http://{args.host}:{args.port}")
+    
+    # Stopping the parent (Ctrl+C or SIGTERM) stops every worker with it
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        print("\n\n⏹️ Server stopped by user")
+    finally:
+        for worker in workers:
+            worker.terminate()
+
 
 if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Enhanced Table Tracker System")
+    parser.add_argument('--host', default='0.0.0.0', help="interface to bind (default: all)")
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--data-dir', help="directory for the database and state journal (default: next to this script)")
+    parser.add_argument('--tables-config', help="JSON file of games and tables (default: tables.json in the data directory, if present)")
+    parser.add_argument('--serve', action='store_true', help="run under the waitress production server instead of the Flask dev server")
+    parser.add_argument('--threads', type=int, help="--serve worker threads (default: sized for --max-streams)")
+    parser.add_argument('--max-streams', type=int, default=32,
+                        help="--serve live-update streams at once; more pages poll instead (default: 32)")
+    parser.add_argument('--backlog', type=int, default=1024, help="--serve listen backlog (default: 1024)")
+    parser.add_argument('--keepalive', type=int, default=120, help="--serve idle keep-alive timeout in seconds (default: 120)")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="--serve worker processes sharing table state through the database (default: 1)")
+    parser.add_argument('--rollover-hour', type=int, default=6, choices=range(24), metavar='HOUR',
+                        help="local hour the business day closes and is archived (default: 6)")
+    parser.add_argument('--audit-fsync', default='batch', choices=AuditLog.FSYNC_POLICIES,
+                        help="audit log durability: fsync each batch, every entry before replying, or never (default: batch)")
+    parser.add_argument('--no-browser', action='store_true', help="don't open a browser on startup")
+    parser.add_argument('--log-level', default='INFO', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'])
+    parser.add_argument('--import-legacy', nargs='+', metavar='FILE',
+                        help="import data exported from pool/Snooker V2.html into the ledger, then exit")
+    args = parser.parse_args()
+    setup_logging(args.log_level)
+    
+    if args.import_legacy:
+        data_dir = args.data_dir or os.path.dirname(os.path.abspath(__file__))
+        ledger = SessionLedger(os.path.join(data_dir, 'table_tracker.db'))
+        archive = SessionArchive(os.path.join(data_dir, 'archive'), args.rollover_hour)
+        today = archive.day_start(time.time())
+        for path in args.import_legacy:
+            with open(path, encoding='utf-8') as f:
+                dump = json.load(f)
+            sessions = list(legacy_sessions(dump))
+            imported = ledger.import_sessions(sessions)
+            print(f"📥 {path}: {imported} new {dump['game_type']} sessions from {dump['date']}")
+            if imported:
+                # A running server archives each closed day once, so rewrite the closed days
+                # these sessions fall on; the open day is archived at its rollover as usual
+                for start in sorted({archive.day_start(session.ended_at) for _, _, session in sessions}):
+                    if start < today:
+                        archive.archive_day(ledger, start)
+        raise SystemExit(0)
+    
+    if args.workers > 1:
+        if not args.serve:
+            parser.error("--workers needs --serve")
+        serve_workers(args)
+        raise SystemExit(0)
+    
     print("🚀 Starting Enhanced Table Tracker System with Complete User Management...")
     try:
-        tracker = SimpleTableTracker()
-        tracker.start()
+        tracker = SimpleTableTracker(args.data_dir, args.tables_config, args.rollover_hour, audit_fsync=args.audit_fsync)
+        tracker.start(host=args.host, port=args.port, serve=args.serve, threads=args.threads,
+                      backlog=args.backlog, keepalive=args.keepalive, open_browser=not args.no_browser,
+                      max_streams=args.max_streams)
     except KeyboardInterrupt:
         print("\n\n👋 System shutdown complete!")
     except Exception as e:
@@ -0,0 +1,59 @@
+"""
+Shared helpers for the benchmark scripts: locate and import the tracker script
+(its file name is not a valid module name) and log in test clients.
+"""
+
+import importlib.util
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TRACKER_SCRIPT = os.path.join(ROOT, "Enhanced Complete Table Tracker System - With Login System, User Management & Remove Users.py")
+
+
+def load_tracker_module():
+    """Import the tracker script as a module named 'table_tracker_app'"""
+    if 'table_tracker_app' in sys.modules:
+        return sys.modules['table_tracker_app']
+    spec = importlib.util.spec_from_file_location('table_tracker_app', TRACKER_SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules['table_tracker_app'] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def login_client(app, username='admin', password='admin123'):
+    """A Flask test client with a logged-in session.
+    
+    Each user logs in once per app and later clients reuse that session cookie,
+    so creating many clients does not run into the login throttle.
+    """
+    sessions = app.extensions.setdefault('benchmark_sessions', {})
+    client = app.test_client()
+    if username in sessions:
+        client.set_cookie('session', sessions[username])
+        return client
+    
+    response = client.post('/login', data={'username': username, 'password': password})
+    if response.status_code != 302:
+        raise RuntimeError(f"login failed for {username}: HTTP {response.status_code}")
+    sessions[username] = client.get_cookie('session').value
+    return client
+
+
+def current_rss_kb():
+    """Resident set size of this process in KB (Linux), or peak RSS elsewhere"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') // 1024
+    except (OSError, ValueError, AttributeError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the NumPy analytics engine over a synthetic multi-year archive
+
+Generates sessions for every table over the requested number of days (busier
+evenings and weekends, 5-180 minute games), writes them as daily archive
+segments, then times loading them into SessionAnalytics and each report. The
+heatmap and revenue reports are also computed with plain Python loops over the
+same sessions, to check the results agree and show the speedup.
+
+    python benchmarks/benchmark_analytics.py --days 730 --tables 6
+"""
+
+import argparse
+import json
+import random
+import tempfile
+import time
+from collections import defaultdict
+
+from _tracker import load_tracker_module
+
+USERS = ['admin', 'staff1', 'staff2', 'ravi', 'meena']
+
+
+def synthetic_days(module, days, tables, seed):
+    """{business date: [(game_type, table_id, started_at, ended_at, seconds, paise, user)]} ending yesterday"""
+    rng = random.Random(seed)
+    archive_days = defaultdict(list)
+    today = time.mktime(time.localtime()[:3] + (0, 0, 0, 0, 0, -1))
+    for day in range(days, 0, -1):
+        opens_at = today - day * 86400 + 10 * 3600
+        weekend = time.localtime(opens_at).tm_wday >= 5
+        for game_type, rate in (('snooker', 3.0), ('pool', 2.0)):
+            for table_id in range(1, tables + 1):
+                clock = opens_at + rng.randint(0, 3600)
+                closes_at = opens_at + 14 * 3600
+                while True:
+                    # Gaps shrink in the evening and at weekends
+                    evening = (clock - opens_at) > 8 * 3600
+                    clock += rng.randint(60, 1800 if (evening or weekend) else 5400)
+                    seconds = rng.randint(5 * 60, 180 * 60)
+                    if clock + seconds > closes_at:
+                        break
+                    started_at = int(clock)
+                    ended_at = started_at + seconds + rng.choice([0, 0, 0, 300])
+                    archive_days[time.strftime("%Y-%m-%d", time.localtime(ended_at))].append(
+                        (game_type, table_id, started_at, ended_at, seconds,
+                         round(seconds / 60 * rate * 100), rng.choice(USERS)))
+                    clock = ended_at
+    return archive_days
+
+
+def archive_line(module, row):
+    game_type, table_id, started_at, ended_at, seconds, paise, user = row
+    session = module.SessionRecord(started_at, ended_at, seconds, paise, user)
+    return module.dumps_with({"game_type": game_type, "table_id": table_id, "started_at": started_at,
+                              "ended_at": ended_at, "cleared": False}, "session", session.to_json())
+
+
+def python_heatmap(rows):
+    """Reference hour-of-week occupancy in table-seconds, one session-hour at a time"""
+    occupied = [0.0] * 168
+    for _, _, started_at, ended_at, _, _, _ in rows:
+        clock = started_at
+        while clock < ended_at:
+            local = time.localtime(clock)
+            hour_end = clock - local.tm_min * 60 - local.tm_sec + 3600
+            occupied[local.tm_wday * 24 + local.tm_hour] += min(ended_at, hour_end) - clock
+            clock = hour_end
+    return occupied
+
+
+def python_revenue(rows):
+    """Reference paise per (game, table, month)"""
+    revenue = defaultdict(int)
+    for game_type, table_id, _, ended_at, _, paise, _ in rows:
+        revenue[(game_type, table_id, time.strftime("%Y-%m", time.localtime(ended_at)))] += paise
+    return revenue
+
+
+def timed(fn, repeat=1):
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--days', type=int, default=730, help="days of history (default: 730)")
+    parser.add_argument('--tables', type=int, default=6, help="tables per game type (default: 6)")
+    parser.add_argument('--repeat', type=int, default=3, help="report runs, best is kept (default: 3)")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', action='store_true', help="print the report as JSON")
+    args = parser.parse_args()
+
+    module = load_tracker_module()
+    archive_days = synthetic_days(module, args.days, args.tables, args.seed)
+    rows = [row for date in sorted(archive_days) for row in archive_days[date]]
+
+    archive = module.SessionArchive(tempfile.mkdtemp(prefix='tracker-analytics-'))
+    for date, day_rows in archive_days.items():
+        archive.write_day(date, [archive_line(module, row) for row in day_rows])
+
+    load_s, analytics = timed(lambda: module.SessionAnalytics.from_archive(archive))
+    columns_s, _ = timed(lambda: module.SessionAnalytics(rows), args.repeat)
+    reports = {
+        "heatmap": timed(analytics.occupancy_heatmap, args.repeat),
+        "durations": timed(analytics.duration_distribution, args.repeat),
+        "revenue": timed(analytics.revenue_by_table, args.repeat),
+    }
+    loops = {
+        "heatmap": timed(lambda: python_heatmap(rows)),
+        "revenue": timed(lambda: python_revenue(rows)),
+    }
+
+    # Same answers from both implementations
+    heatmap = reports["heatmap"][1]
+    expected = [round(seconds / 3600 / heatmap["weeks"], 3) for seconds in loops["heatmap"][1]]
+    # "weeks" is reported rounded, so allow for that
+    if any(abs(a - b) > 0.002 + 0.01 * b for a, b in zip(sum(heatmap["occupancy"], []), expected)):
+        raise SystemExit("heatmap disagrees with the reference loop")
+    revenue = reports["revenue"][1]
+    for (game_type, table_id, month), paise in loops["revenue"][1].items():
+        if abs(revenue["tables"][game_type][str(table_id)][revenue["months"].index(month)] - paise / 100) > 0.01:
+            raise SystemExit("revenue disagrees with the reference loop")
+
+    report = {
+        "days": args.days,
+        "tables": 2 * args.tables,
+        "sessions": len(rows),
+        "load_archive_ms": round(load_s * 1000, 1),
+        "build_columns_ms": round(columns_s * 1000, 1),
+        "reports_ms": {name: round(seconds * 1000, 2) for name, (seconds, _) in reports.items()},
+        "python_loops_ms": {name: round(seconds * 1000, 1) for name, (seconds, _) in loops.items()},
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"\n{report['sessions']} sessions over {args.days} days, {report['tables']} tables\n")
+    print(f"Load archive segments: {report['load_archive_ms']:.1f} ms "
+          f"(columns from rows: {report['build_columns_ms']:.1f} ms)\n")
+    print(f"{'report':<12}{'numpy ms':>10}{'loops ms':>10}{'speedup':>9}")
+    for name, ms in report["reports_ms"].items():
+        loop_ms = report["python_loops_ms"].get(name)
+        speedup = f"{loop_ms / ms:>8.0f}x" if loop_ms and ms else f"{'-':>9}"
+        print(f"{name:<12}{ms:>10.2f}{loop_ms if loop_ms is not None else '-':>10}{speedup}")
+
+
+if __name__ == "__main__":
+    main()
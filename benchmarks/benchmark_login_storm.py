@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Login storm benchmark: table-poll latency while logins hammer the server
+
+Starts the tracker with --serve and has simulated tablets poll
+/api/<game_type>/tables, first on their own and then while attackers post
+wrong passwords to /login. Each attacker uses its own account and its own
+loopback address (127.0.0.x), so the attempts reach password hashing instead
+of all being turned away by a single client's throttle. Reports poll latency
+for both phases and what the logins got back: 200 wrong password, 429
+throttled, 503 pool busy.
+
+    python benchmarks/benchmark_login_storm.py --clients 20 --attackers 20 --duration 10
+"""
+
+import argparse
+import http.client
+import json
+import secrets
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from collections import Counter
+
+from _tracker import TRACKER_SCRIPT, percentile
+from benchmark_serving import free_port, login, run_client, wait_for_port
+
+
+def add_users(port, cookie, count):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    for n in range(count):
+        body = json.dumps({'username': f'storm{n}', 'password': secrets.token_hex(8), 'role': 'staff'})
+        conn.request('POST', '/api/users/add', body, {'Cookie': cookie, 'Content-Type': 'application/json'})
+        response = conn.getresponse()
+        response.read()
+        if response.status != 200:
+            raise RuntimeError(f"could not add user storm{n}: HTTP {response.status}")
+    conn.close()
+
+
+def run_attacker(port, n, stop_at, statuses):
+    source = (f'127.0.0.{n + 2}', 0)
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30, source_address=source)
+    while time.perf_counter() < stop_at:
+        body = urllib.parse.urlencode({'username': f'storm{n}', 'password': secrets.token_hex(8)})
+        try:
+            conn.request('POST', '/login', body, {'Content-Type': 'application/x-www-form-urlencoded'})
+            response = conn.getresponse()
+            response.read()
+            statuses[response.status] += 1
+        except (OSError, http.client.HTTPException) as e:
+            statuses[type(e).__name__] += 1
+            conn.close()
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30, source_address=source)
+    conn.close()
+
+
+def poll_phase(port, cookie, clients, duration, attackers=0):
+    latencies, errors, statuses = [], [], Counter()
+    stop_at = time.perf_counter() + duration
+    threads = [threading.Thread(target=run_client, args=(port, cookie, 'snooker' if i % 2 else 'pool',
+                                                         stop_at, latencies, errors))
+               for i in range(clients)]
+    threads += [threading.Thread(target=run_attacker, args=(port, n, stop_at, statuses)) for n in range(attackers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    ms = sorted(value * 1000 for value in latencies)
+    return {
+        "polls": len(ms),
+        "poll_errors": len(errors),
+        "rps": len(ms) / duration,
+        "p50": percentile(ms, 50),
+        "p99": percentile(ms, 99),
+        "logins": dict(statuses),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--clients', type=int, default=20, help="polling tablets (default: 20)")
+    parser.add_argument('--attackers', type=int, default=20, help="concurrent login attackers, at most 250 (default: 20)")
+    parser.add_argument('--duration', type=float, default=10, help="seconds per phase (default: 10)")
+    parser.add_argument('--threads', type=int, default=16, help="waitress worker threads (default: 16)")
+    args = parser.parse_args()
+
+    port = free_port()
+    cmd = [sys.executable, TRACKER_SCRIPT, '--host', '127.0.0.1', '--port', str(port), '--serve',
+           '--threads', str(args.threads), '--data-dir', tempfile.mkdtemp(prefix='tracker-login-'),
+           '--no-browser', '--log-level', 'ERROR']
+    server = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_port(port)
+        cookie = login(port)
+        add_users(port, cookie, args.attackers)
+        quiet = poll_phase(port, cookie, args.clients, args.duration)
+        storm = poll_phase(port, cookie, args.clients, args.duration, args.attackers)
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+    print(f"\n{args.clients} tablets polling, {args.attackers} login attackers, {args.duration:.0f}s per phase\n")
+    print(f"{'phase':<10}{'polls/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for label, r in (("quiet", quiet), ("storm", storm)):
+        print(f"{label:<10}{r['rps']:>10.1f}{r['p50']:>10.2f}{r['p99']:>10.2f}{r['poll_errors']:>8}")
+    print("\nLogin responses during the storm: "
+          + ", ".join(f"{status}: {count}" for status, count in sorted(storm["logins"].items(), key=str)))
+
+
+if __name__ == "__main__":
+    main()
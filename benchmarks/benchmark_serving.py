@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Load benchmark: Flask development server vs. --serve (waitress) mode
+
+Starts the tracker in a subprocess for each mode, logs in N simulated tablets
+over keep-alive HTTP connections and has them poll /api/<game_type>/tables as
+fast as they can, while --streams more pages hold live-update streams open
+the whole time, as open screens do. Reports throughput and latency
+percentiles for each mode, and how many streams were served or refused.
+With --workers N, also measures --serve with N worker processes.
+
+    python benchmarks/benchmark_serving.py --clients 50 --streams 20 --duration 10 --workers 4
+"""
+
+import argparse
+import http.client
+import os
+import select
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+
+from _tracker import TRACKER_SCRIPT, percentile
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_for_port(port, timeout=15):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"server did not start on port {port}")
+
+
+def login(port):
+    """Log in as admin and return the session cookie"""
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    body = urllib.parse.urlencode({'username': 'admin', 'password': 'admin123'})
+    conn.request('POST', '/login', body, {'Content-Type': 'application/x-www-form-urlencoded'})
+    response = conn.getresponse()
+    response.read()
+    conn.close()
+    return response.getheader('Set-Cookie').split(';', 1)[0]
+
+
+def run_client(port, cookie, game_type, stop_at, latencies, errors):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    headers = {'Cookie': cookie}
+    while time.perf_counter() < stop_at:
+        started = time.perf_counter()
+        try:
+            conn.request('GET', f'/api/{game_type}/tables', headers=headers)
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                errors.append(response.status)
+            latencies.append(time.perf_counter() - started)
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(repr(e))
+            conn.close()
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    conn.close()
+
+
+def hold_stream(port, cookie, stop_at, answered, outcomes):
+    """Keep one live-update stream open until stop_at, like an open page.
+    
+    Appends to `answered` once the server responds, then to `outcomes` 'held'
+    if the stream stayed open throughout, 'closed' if the server ended it
+    early, or the refusal status or error.
+    """
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    try:
+        conn.request('GET', '/api/snooker/stream', headers={'Cookie': cookie})
+        response = conn.getresponse()
+        answered.append(response.status)
+        if response.status != 200:
+            outcomes.append(response.status)
+            return
+        # The connection hands its socket over to a streaming response. Only an early close
+        # matters, so read the socket directly: read1() would block for the next chunk.
+        fd = response.fileno()
+        while time.perf_counter() < stop_at:
+            if select.select([fd], [], [], 0.5)[0] and not os.read(fd, 4096):
+                outcomes.append('closed')
+                return
+        outcomes.append('held')
+    except (OSError, ValueError, http.client.HTTPException) as e:
+        answered.append(None)
+        outcomes.append(repr(e))
+    finally:
+        conn.close()
+
+
+def benchmark_mode(label, extra_args, clients, duration, threads, streams):
+    port = free_port()
+    data_dir = tempfile.mkdtemp(prefix='tracker-bench-')
+    cmd = [sys.executable, TRACKER_SCRIPT, '--host', '127.0.0.1', '--port', str(port),
+           '--data-dir', data_dir, '--no-browser'] + extra_args
+    if '--serve' in extra_args and threads:
+        cmd += ['--threads', str(threads)]
+    server = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_port(port)
+        cookie = login(port)
+
+        latencies, errors, answered, stream_outcomes = [], [], [], []
+        stop_at = time.perf_counter() + duration
+        holders = [threading.Thread(target=hold_stream, args=(port, cookie, stop_at + 1, answered, stream_outcomes))
+                   for _ in range(streams)]
+        for holder in holders:
+            holder.start()
+        while len(answered) < streams and time.perf_counter() < stop_at:
+            time.sleep(0.05)
+        workers = [
+            threading.Thread(target=run_client, args=(port, cookie, 'snooker' if i % 2 else 'pool', stop_at, latencies, errors))
+            for i in range(clients)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        for holder in holders:
+            holder.join()
+
+        latencies.sort()
+        ms = [value * 1000 for value in latencies]
+        return {
+            "label": label,
+            "requests": len(latencies),
+            "errors": len(errors),
+            "rps": len(latencies) / duration,
+            "p50": percentile(ms, 50),
+            "p95": percentile(ms, 95),
+            "p99": percentile(ms, 99),
+            "mean": statistics.fmean(ms) if ms else 0.0,
+            "streams": stream_outcomes.count('held'),
+            "refused": stream_outcomes.count(503),
+        }
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--clients', type=int, default=50, help="concurrent simulated clients (default: 50)")
+    parser.add_argument('--duration', type=float, default=10, help="seconds per mode (default: 10)")
+    parser.add_argument('--streams', type=int, default=20, help="pages holding live-update streams (default: 20)")
+    parser.add_argument('--threads', type=int, help="waitress worker threads (default: the server's)")
+    parser.add_argument('--workers', type=int, default=1, help="also run --serve with this many processes (default: off)")
+    args = parser.parse_args()
+
+    results = [
+        benchmark_mode("flask dev server", [], args.clients, args.duration, args.threads, args.streams),
+        benchmark_mode("--serve (waitress)", ['--serve'], args.clients, args.duration, args.threads, args.streams),
+    ]
+    if args.workers > 1:
+        results.append(benchmark_mode(f"--serve --workers {args.workers}", ['--serve', '--workers', str(args.workers)],
+                                      args.clients, args.duration, args.threads, args.streams))
+
+    print(f"\n{args.clients} clients polling for {args.duration:.0f}s per mode, {args.streams} streams open\n")
+    print(f"{'mode':<22}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}{'streams':>9}{'refused':>9}")
+    for r in results:
+        print(f"{r['label']:<22}{r['rps']:>10.1f}{r['p50']:>10.2f}{r['p95']:>10.2f}{r['p99']:>10.2f}{r['errors']:>8}"
+              f"{r['streams']:>9}{r['refused']:>9}")
+
+    dev, prod = results[:2]
+    if dev['rps']:
+        print(f"\nThroughput gain: {prod['rps'] / dev['rps']:.2f}x, p99 {dev['p99']:.1f}ms -> {prod['p99']:.1f}ms")
+    if len(results) > 2 and prod['rps']:
+        print(f"{args.workers} workers vs one process: {results[2]['rps'] / prod['rps']:.2f}x throughput")
+
+
+if __name__ == "__main__":
+    main()
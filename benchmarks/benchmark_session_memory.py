@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Memory and serialization benchmark: session dicts vs. slotted SessionRecord
+
+Builds N sessions twice, once in the old layout (a dict per session holding
+formatted time/date strings, float minutes and rupees, and a fresh username
+string as read back from SQLite) and once as SessionRecord objects (epoch ints,
+integer paise, interned usernames). Reports the memory each layout holds,
+measured with tracemalloc, and how long it takes to encode all of them to JSON
+in one json.dumps() call: records go through as_dict() first.
+
+    python benchmarks/benchmark_session_memory.py --sessions 100000
+"""
+
+import argparse
+import gc
+import json
+import random
+import time
+import tracemalloc
+
+from _tracker import load_tracker_module
+
+USERS = ['admin', 'staff1', 'staff2', 'ravi', 'meena']
+
+
+def sample_sessions(count, seed):
+    """(started_at, ended_at, billed_seconds, amount_paise, user) tuples over the last ~year, oldest first"""
+    rng = random.Random(seed)
+    now = int(time.time())
+    rows = []
+    for _ in range(count):
+        ended_at = now - rng.randint(0, 365 * 86400)
+        seconds = rng.randint(300, 3 * 3600)
+        rate = rng.choice([2.0, 2.5, 3.0, 4.0, 4.5])
+        rows.append((ended_at - seconds, ended_at, seconds, round(seconds / 60 * rate * 100), rng.choice(USERS)))
+    rows.sort()
+    return rows
+
+
+def build_dicts(rows):
+    sessions = []
+    for started_at, ended_at, seconds, amount_paise, user in rows:
+        sessions.append({
+            "start_time": time.strftime("%H:%M:%S", time.localtime(started_at)),
+            "end_time": time.strftime("%H:%M:%S", time.localtime(ended_at)),
+            "duration": round(seconds / 60, 1),
+            "amount": amount_paise / 100,
+            "date": time.strftime("%Y-%m-%d", time.localtime(ended_at)),
+            # A new str per row, as sqlite3 returns them
+            "user": ''.join(list(user))
+        })
+    return sessions
+
+
+def build_records(module, rows):
+    return [module.SessionRecord(started_at, ended_at, seconds, amount_paise, ''.join(list(user)))
+            for started_at, ended_at, seconds, amount_paise, user in rows]
+
+
+def measure_memory(build):
+    """Bytes still allocated by build() once it returns, and the built object"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    built = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before, built
+
+
+def best_time(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=100000, help="sessions to build (default: 100000)")
+    parser.add_argument('--repeat', type=int, default=3, help="serialization runs, best is kept (default: 3)")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', action='store_true', help="print the report as JSON")
+    args = parser.parse_args()
+
+    module = load_tracker_module()
+    rows = sample_sessions(args.sessions, args.seed)
+
+    dict_bytes, dicts = measure_memory(lambda: build_dicts(rows))
+    record_bytes, records = measure_memory(lambda: build_records(module, rows))
+
+    dict_json = json.dumps(dicts, separators=(',', ':'))
+    record_json = json.dumps([record.as_dict() for record in records], separators=(',', ':'))
+    if dict_json != record_json:
+        raise SystemExit("serializers disagree: SessionRecord.as_dict() must match the dict layout")
+
+    report = {
+        "sessions": args.sessions,
+        "dict": {
+            "bytes": dict_bytes,
+            "bytes_per_session": round(dict_bytes / args.sessions, 1),
+            "encode_ms": round(best_time(lambda: json.dumps(dicts, separators=(',', ':')), args.repeat) * 1000, 1),
+        },
+        "record": {
+            "bytes": record_bytes,
+            "bytes_per_session": round(record_bytes / args.sessions, 1),
+            "encode_ms": round(best_time(lambda: json.dumps([record.as_dict() for record in records], separators=(',', ':')),
+                                         args.repeat) * 1000, 1),
+        },
+        "json_bytes": len(record_json),
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"\n{args.sessions} sessions, {report['json_bytes'] / 1024 / 1024:.1f} MB as JSON\n")
+    print(f"{'layout':<16}{'memory MB':>12}{'bytes/session':>16}{'encode ms':>12}")
+    for label, key in (("dict", "dict"), ("SessionRecord", "record")):
+        row = report[key]
+        print(f"{label:<16}{row['bytes'] / 1024 / 1024:>12.1f}{row['bytes_per_session']:>16.1f}{row['encode_ms']:>12.1f}")
+    if record_bytes:
+        print(f"\nMemory: {dict_bytes / record_bytes:.1f}x smaller with SessionRecord")
+    if report["dict"]["encode_ms"]:
+        print(f"Encoding: {report['record']['encode_ms'] / report['dict']['encode_ms']:.2f}x the dict layout's time, "
+              f"as records build their dicts first")
+
+
+if __name__ == "__main__":
+    main()
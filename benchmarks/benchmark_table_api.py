@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Latency and throughput benchmark for the table API (in-process, no network)
+
+Builds a SimpleTableTracker with a temporary data directory, sizes it to the
+requested number of tables and session-history length, then runs N simulated
+staff tablets against its Flask app through test clients. Each tablet polls
+/api/<game_type>/tables and now and then fires start/pause/end/split on a
+random table. Reports p50/p95/p99 latency per endpoint, overall throughput and
+process RSS, so regressions in the hot paths show up as numbers.
+
+    python benchmarks/benchmark_table_api.py --tablets 20 --tables 10 --history 500
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+
+from _tracker import current_rss_kb, load_tracker_module, login_client, percentile
+
+ACTIONS = ['start', 'pause', 'end', 'split']
+
+
+def write_tables_config(data_dir, tables_per_game):
+    """A tables.json giving each game tables_per_game tables"""
+    config = {"games": [{"key": "snooker", "tables": tables_per_game, "rate": 3.0},
+                        {"key": "pool", "tables": tables_per_game, "rate": 2.0}]}
+    with open(os.path.join(data_dir, 'tables.json'), 'w', encoding='utf-8') as f:
+        json.dump(config, f)
+
+
+def add_history(module, tracker, history):
+    """Give every table `history` past 45-minute sessions"""
+    ended_at = int(time.time()) - 86400
+    for tables in tracker.tables.values():
+        for table in tables.values():
+            table.sessions = tuple(
+                module.SessionRecord(ended_at - 2700, ended_at, 2700, round(45 * table.rate * 100), "staff1")
+                for _ in range(history)
+            )
+
+
+def run_tablet(client, seed, stop_at, action_ratio, conditional, tables_per_game, samples):
+    rng = random.Random(seed)
+    state = {}  # game_type -> (etag, revision) for conditional polling
+
+    while time.perf_counter() < stop_at:
+        game_type = rng.choice(['snooker', 'pool'])
+
+        if rng.random() < action_ratio:
+            table_id = rng.randint(1, tables_per_game)
+            action = rng.choice(ACTIONS)
+            if action == 'split':
+                endpoint, url, body = 'split', f'/api/{game_type}/table/{table_id}/split', {'players': 2}
+            else:
+                endpoint, url, body = action, f'/api/{game_type}/table/{table_id}/action', {'action': action}
+            started = time.perf_counter()
+            response = client.post(url, json=body)
+        else:
+            endpoint, url, headers = 'poll', f'/api/{game_type}/tables', {}
+            if conditional and game_type in state:
+                etag, revision = state[game_type]
+                url += f'?since={revision}'
+                headers['If-None-Match'] = etag
+            started = time.perf_counter()
+            response = client.get(url, headers=headers)
+            if conditional and response.status_code == 200:
+                state[game_type] = (response.headers['ETag'], response.get_json()['revision'])
+
+        samples.append((endpoint, time.perf_counter() - started, response.status_code, len(response.data)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tablets', type=int, default=20, help="simulated staff tablets (default: 20)")
+    parser.add_argument('--tables', type=int, default=3, help="tables per game type (default: 3)")
+    parser.add_argument('--history', type=int, default=100, help="past sessions per table (default: 100)")
+    parser.add_argument('--duration', type=float, default=10, help="seconds to run (default: 10)")
+    parser.add_argument('--action-ratio', type=float, default=0.1, help="share of requests that are actions (default: 0.1)")
+    parser.add_argument('--conditional', action='store_true', help="poll with ETag/since like the web clients")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', action='store_true', help="print the report as JSON")
+    args = parser.parse_args()
+
+    module = load_tracker_module()
+    rss_before = current_rss_kb()
+    data_dir = tempfile.mkdtemp(prefix='tracker-bench-')
+    write_tables_config(data_dir, args.tables)
+    tracker = module.SimpleTableTracker(data_dir)
+    add_history(module, tracker, args.history)
+    rss_loaded = current_rss_kb()
+
+    # Log every tablet in up front so password hashing stays out of the measurement
+    clients = [login_client(tracker.app) for _ in range(args.tablets)]
+    samples = []
+    stop_at = time.perf_counter() + args.duration
+    tablets = [
+        threading.Thread(target=run_tablet, args=(client, args.seed + i, stop_at, args.action_ratio,
+                                                  args.conditional, args.tables, samples))
+        for i, client in enumerate(clients)
+    ]
+    for tablet in tablets:
+        tablet.start()
+    for tablet in tablets:
+        tablet.join()
+
+    report = {
+        "tablets": args.tablets,
+        "tables_per_game": args.tables,
+        "history": args.history,
+        "duration_s": args.duration,
+        "requests": len(samples),
+        "throughput_rps": round(len(samples) / args.duration, 1),
+        "errors": sum(1 for _, _, status, _ in samples if status >= 500),
+        "rss_kb": {"baseline": rss_before, "loaded": rss_loaded, "after": current_rss_kb()},
+        "endpoints": {},
+    }
+    for endpoint in ['poll'] + ACTIONS:
+        rows = [s for s in samples if s[0] == endpoint]
+        if not rows:
+            continue
+        ms = sorted(latency * 1000 for _, latency, _, _ in rows)
+        report["endpoints"][endpoint] = {
+            "count": len(rows),
+            "p50_ms": round(percentile(ms, 50), 3),
+            "p95_ms": round(percentile(ms, 95), 3),
+            "p99_ms": round(percentile(ms, 99), 3),
+            "avg_bytes": round(sum(size for _, _, _, size in rows) / len(rows)),
+        }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"\n{args.tablets} tablets, {args.tables} tables/game, {args.history} sessions/table, "
+          f"{args.duration:.0f}s{' (conditional polling)' if args.conditional else ''}\n")
+    print(f"{'endpoint':<10}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'avg bytes':>12}")
+    for endpoint, row in report["endpoints"].items():
+        print(f"{endpoint:<10}{row['count']:>8}{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}{row['p99_ms']:>10.2f}{row['avg_bytes']:>12}")
+    rss = report["rss_kb"]
+    print(f"\nThroughput: {report['throughput_rps']} req/s, server errors: {report['errors']}")
+    print(f"RSS: {rss['baseline'] / 1024:.1f} MB at start, {rss['loaded'] / 1024:.1f} MB loaded, {rss['after'] / 1024:.1f} MB after run")
+
+
+if __name__ == "__main__":
+    main()